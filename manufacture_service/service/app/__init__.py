@@ -20,14 +20,16 @@
     3) Try to send supply.
 '''
 
-from flask import Flask, Blueprint
+from celery import Celery
+from flask import Flask, Blueprint, has_app_context
 from flask_restx import Api
-from flask_httpauth import HTTPBasicAuth
+from flask_httpauth import HTTPBasicAuth, HTTPTokenAuth, MultiAuth
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 
-# from manager.app import app as manager
-# from manager.app.tasks import simple_task
+from app.client import RetailerClient
+from app.compress import Compress
+from app.credentials import CredentialCache
 
 
 api_bp = Blueprint('api', __name__)
@@ -38,9 +40,30 @@ api = Api(
     description='Manage manufactures, their admins, their assortment (for '
                 'WHO, WHAT and HOW MUCH they send).',
 )
-auth = HTTPBasicAuth()
+basic_auth = HTTPBasicAuth()
+token_auth = HTTPTokenAuth(scheme='Bearer')
+auth = MultiAuth(basic_auth, token_auth)
 db = SQLAlchemy()
 migrate = Migrate()
+retailer = RetailerClient()
+compress = Compress()
+credentials = CredentialCache()
+celery = Celery(__name__, include=['app.tasks'])
+
+
+def init_celery(app):
+    '''Configure celery from CELERY_* settings, run tasks in app context.'''
+    celery.conf.update(app.config.get_namespace('CELERY_'))
+
+    class ContextTask(celery.Task):
+        def __call__(self, *args, **kwargs):
+            if has_app_context():  # Eager (tests)
+                return self.run(*args, **kwargs)
+
+            with app.app_context():
+                return self.run(*args, **kwargs)
+
+    celery.Task = ContextTask
 
 
 def create_app():
@@ -49,6 +72,10 @@ def create_app():
 
     db.init_app(app)
     migrate.init_app(app, db)
+    retailer.init_app(app)
+    compress.init_app(app)
+    credentials.init_app(app)
+    init_celery(app)
 
     from app.models import models
     from app.resources import resources
@@ -57,19 +84,4 @@ def create_app():
     app.register_blueprint(resources)
     app.register_blueprint(api_bp)
 
-    # @app.route('/test_celery/start/<name>')
-    # def start_simple_task(name):
-    #     task = simple_task.delay()
-    #     return task.id
-
-    # @app.route('/test_celery/result/<task_id>')
-    # def result_simple_task(task_id):
-    #     task = simple_task.AsyncResult(task_id)
-    #     result = task.get(timeout=3)
-    #     response = {
-    #         'state': task.state,
-    #         'result': result,
-    #     }
-    #     return response
-
     return app
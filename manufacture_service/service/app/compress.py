@@ -0,0 +1,92 @@
+''' Negotiated gzip of responses and gzip-encoded request bodies.
+
+    Responses of COMPRESS_MIN_SIZE bytes or more are gzipped when the client
+    accepts it (Accept-Encoding), streamed ones (like NDJSON export) are
+    gzipped chunk by chunk. ETag of a gzipped response is made weak, it is
+    not the same bytes any more (If-None-Match compares weakly anyway).
+
+    Request bodies with `Content-Encoding: gzip` are decompressed before the
+    view reads them, up to COMPRESS_MAX_REQUEST bytes.
+'''
+from gzip import compress
+from io import BytesIO
+from zlib import MAX_WBITS, compressobj, decompressobj, error as ZlibError
+
+from flask import request
+from flask_restx import abort
+
+GZIP = MAX_WBITS | 16  # zlib wbits of gzip container
+
+
+class Compress:
+    def __init__(self):
+        self.min_size = 1024
+        self.level = 6
+        self.max_request = 16 * 2 ** 20
+
+    def init_app(self, app):
+        self.min_size = app.config['COMPRESS_MIN_SIZE']
+        self.level = app.config['COMPRESS_LEVEL']
+        self.max_request = app.config['COMPRESS_MAX_REQUEST']
+
+        app.before_request(self.decompress_request)
+        app.after_request(self.compress_response)
+
+    def decompress_request(self):
+        if request.headers.get('Content-Encoding', '').lower() != 'gzip':
+            return
+
+        stream = decompressobj(GZIP)
+        try:
+            body = stream.decompress(request.get_data(), self.max_request + 1)
+        except ZlibError:
+            abort(400, 'Invalid gzip body.')
+
+        if len(body) > self.max_request or stream.unconsumed_tail:
+            abort(413, f'Body is larger then {self.max_request} bytes.')
+
+        environ = request.environ
+        environ['wsgi.input'] = BytesIO(body)
+        environ['CONTENT_LENGTH'] = str(len(body))
+        del environ['HTTP_CONTENT_ENCODING']
+
+        # Request caches the body read above, make it read again
+        request._cached_data = body
+        request.__dict__.pop('stream', None)
+
+    def compress_response(self, response):
+        if (
+            response.status_code < 200
+            or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers
+            or response.direct_passthrough
+            or not request.accept_encodings['gzip']
+        ):
+            return response
+
+        if response.is_streamed:
+            response.response = self._stream(response.response)
+            response.headers.pop('Content-Length', None)
+
+        elif (size := response.calculate_content_length()) is None or size < self.min_size:
+            return response
+
+        else:
+            response.set_data(compress(response.get_data(), self.level))
+
+        response.headers['Content-Encoding'] = 'gzip'
+        response.vary.add('Accept-Encoding')
+
+        if (etag := response.get_etag())[0] is not None:
+            response.set_etag(etag[0], weak=True)
+
+        return response
+
+    def _stream(self, chunks):
+        stream = compressobj(self.level, wbits=GZIP)
+
+        for chunk in chunks:
+            if data := stream.compress(chunk.encode() if isinstance(chunk, str) else chunk):
+                yield data
+
+        yield stream.flush()
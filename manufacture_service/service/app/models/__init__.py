@@ -6,3 +6,5 @@ from .manudacture import ManufactureModel
 from .admin import AdminModel
 from .launcher import LauncherModel
 from .history import HistoryModel
+from .lock import LockModel
+from .plan import PlanModel
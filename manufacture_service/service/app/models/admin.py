@@ -1,7 +1,8 @@
 from flask import g
-from werkzeug.security import check_password_hash, generate_password_hash
+from werkzeug.security import check_password_hash
 
-from app import db, auth
+from app import db, basic_auth, credentials, token_auth, tokens
+from app.credentials import hash_password, needs_rehash
 
 
 class AdminModel(db.Model):
@@ -20,21 +21,40 @@ class AdminModel(db.Model):
         self.set_password(password)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
+    @property
+    def claims(self):
+        '''What a bearer token of this admin carries.'''
+        return {'pid': self.pid, 'manufacture_pid': self.manufacture_pid, 'login': self.login}
+
     @classmethod
     def get_by_login(cls, login):
         return cls.query.filter_by(login=login).first()
 
     @staticmethod
-    @auth.verify_password
+    @basic_auth.verify_password
     def verify_password(login, password):
         admin = AdminModel.query.filter_by(login=login).first()
 
-        if not admin or not admin.check_password(password):
+        if not admin or not credentials.verify(login, password, admin.password_hash, admin.check_password):
+            return False
+
+        # Hashed with outdated method or cost
+        if needs_rehash(admin.password_hash):
+            admin.set_password(password)
+            db.session.commit()
+
+        g.admin = admin
+        return True
+
+    @staticmethod
+    @token_auth.verify_token
+    def verify_token(token):
+        if (admin := tokens.verify(token, 'pid', 'manufacture_pid', 'login')) is None:
             return False
 
         g.admin = admin
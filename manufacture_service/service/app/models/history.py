@@ -8,7 +8,7 @@ class HistoryModel(db.Model, Aid):
     aid = db.Column(db.String(32), primary_key=True)
     launcher_aid = db.Column(db.String(32), db.ForeignKey('launcher_model.aid', onupdate='CASCADE', ondelete='CASCADE'), nullable=False)
 
-    datetime = db.Column(db.DateTime, default=datetime.utcnow())
+    datetime = db.Column(db.DateTime, default=datetime.utcnow)
 
     amount = db.Column(db.Integer, nullable=False)
     success = db.Column(db.Boolean, nullable=False)
@@ -16,6 +16,23 @@ class HistoryModel(db.Model, Aid):
 
     # send / resived - If some products can be lost on the way to retailer
 
+    __table_args__ = (db.Index('ix_history_model_launcher_aid_datetime', 'launcher_aid', 'datetime'), )
+
     def __init__(self, **kwargs):
         db.Model.__init__(self, **kwargs)
-        self.aid = self.generate_key(32)
+        self.aid = self.generate_key()
+
+    @classmethod
+    def latest(cls, launcher_aids) -> dict:
+        ''' Return last attempt of each launcher, {launcher_aid: HistoryModel},
+            in one query (launchers without history are not in it).
+        '''
+        n = db.func.row_number().over(
+            partition_by=cls.launcher_aid,
+            order_by=(cls.datetime.desc(), cls.aid.desc()),  # aid sorts by time within a ms
+        ).label('n')
+
+        ranked = db.session.query(cls, n).filter(cls.launcher_aid.in_(launcher_aids)).subquery()
+        history = db.aliased(cls, ranked)
+
+        return {h.launcher_aid: h for h in db.session.query(history).filter(ranked.c.n == 1)}
@@ -15,4 +15,4 @@ class LauncherModel(db.Model, Aid):
 
     def __init__(self, **kwargs):
         db.Model.__init__(self, **kwargs)
-        self.aid = self.generate_key(32)
+        self.aid = self.generate_key()
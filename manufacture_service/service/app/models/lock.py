@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+
+
+class LockModel(db.Model):
+    ''' Named lock shared by all workers, one row per taken lock. A lock past
+        expires is free again, so a crashed holder blocks only until then.
+    '''
+    name = db.Column(db.String(32), primary_key=True)
+    owner = db.Column(db.String(32), nullable=False)
+    expires = db.Column(db.DateTime, nullable=False)
+
+    @staticmethod
+    def acquire(name: str, owner: str, ttl: float) -> bool:
+        '''Take lock name for owner for ttl seconds (commited), False if held.'''
+        now = datetime.utcnow()
+        expires = now + timedelta(seconds=ttl)
+
+        taken = LockModel.query.filter(LockModel.name == name, LockModel.expires < now).update(
+            {'owner': owner, 'expires': expires},
+            synchronize_session=False,
+        )
+
+        if not taken and db.session.get(LockModel, name) is not None:
+            db.session.commit()
+            return False
+
+        if not taken:
+            db.session.add(LockModel(name=name, owner=owner, expires=expires))
+
+        try:
+            db.session.commit()
+
+        except IntegrityError:  # Taken by another one since the SELECT
+            db.session.rollback()
+            return False
+
+        return True
+
+    @staticmethod
+    def release(name: str, owner: str) -> None:
+        '''Free lock name if owner still holds it (commited).'''
+        LockModel.query.filter_by(name=name, owner=owner).delete(synchronize_session=False)
+        db.session.commit()
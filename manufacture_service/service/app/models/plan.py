@@ -0,0 +1,31 @@
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from app import db
+
+
+class PlanModel(db.Model):
+    ''' Plan sent with a client's Idempotency-Key (POST /supply). A retry
+        with the key resends the same plan: planned again it would carry
+        over the failed attempt and retailer service would refuse the key.
+        Kept for SUPPLY_KEY_TTL, like retailer service keeps the key.
+    '''
+    key = db.Column(db.String(64), primary_key=True)
+    plan = db.Column(db.JSON, nullable=False)
+    datetime = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    @staticmethod
+    def expired_before() -> datetime:
+        return datetime.utcnow() - timedelta(seconds=current_app.config['SUPPLY_KEY_TTL'])
+
+    @staticmethod
+    def find(key: str) -> dict:
+        '''Return plan stored with key (not expired) or None.'''
+        stored = PlanModel.query.filter(PlanModel.key == key, PlanModel.datetime >= PlanModel.expired_before()).first()
+        return None if stored is None else stored.plan
+
+    @staticmethod
+    def store(key: str, plan: dict) -> None:
+        '''Store plan with key (not commited), replaces an expired one.'''
+        db.session.merge(PlanModel(key=key, plan=plan, datetime=datetime.utcnow()))
@@ -6,3 +6,5 @@ from .manufacture import ManufactureRead, ManufactureChange
 from .admin import Admin
 from .launcher import Launchers, LauncherEdit
 from .supply import Supply
+from .circuit import Circuit
+from .token import Token
@@ -0,0 +1,44 @@
+from flask_restx import Resource, fields
+
+from app import api, retailer
+
+
+# Namespace
+ns = api.namespace(
+    'Circuit',
+    description='State of the circuit breaker of retailer service calls (this worker only).',
+    path='/',
+)
+
+
+# Output
+circuit_model = ns.model('CircuitModel', {
+    'state': fields.String(
+        description='closed / open / half_open',
+        example='closed',
+    ),
+    'trips': fields.Integer(
+        description='How many times it opened',
+        example=2,
+    ),
+    'rejected': fields.Integer(
+        description='Calls failed at once while open',
+        example=154,
+    ),
+    'failure_rate': fields.Float(
+        description='Failed part of recent calls',
+        example=0.1,
+    ),
+    'slow_rate': fields.Float(
+        description='Slow part of recent calls',
+        example=0.05,
+    ),
+})
+
+
+@ns.route('/circuit')
+class Circuit(Resource):
+    @ns.marshal_with(circuit_model, False, 200, 'Circuit breaker state.')
+    def get(self):
+        '''GET circuit breaker state'''
+        return retailer.breaker.stats()
@@ -117,6 +117,8 @@ class ManufactureChange(Resource):
         '''PATCH manufacture'''
         args = patch_manufacture.parse_args()
         manufacture = ManufactureModel.query.filter_by(pid=g.admin.manufacture_pid).first()
+        if not manufacture:
+            abort(401, 'Manufacture does not exist any more.')
 
         errors = {}
 
@@ -159,6 +161,8 @@ class ManufactureChange(Resource):
         '''DELETE manufacture'''
         pid = g.admin.manufacture_pid
         manufacture = ManufactureModel.query.filter_by(pid=pid).first()
+        if not manufacture:
+            abort(401, 'Manufacture does not exist any more.')
 
         db.session.delete(manufacture)
         db.session.commit()
@@ -1,14 +1,11 @@
-from re import match
-from requests import session
-from requests.exceptions import ConnectionError, ConnectTimeout
-from json import dump
+from requests import codes
 
-from flask import g
-from flask_restx import Resource, abort, fields
+from flask import g, request
+from flask_restx import Resource, abort
 
-from app import api, auth, db
-from app.models.launcher import LauncherModel
-from app.models.history import HistoryModel
+from app import api, auth, db, supply
+from app.client import idempotency_key
+from app.models import PlanModel
 
 
 # Namespace
@@ -30,60 +27,27 @@ class Supply(Resource):
     @ns.response(404, 'Launcher not found.')
     @ns.response(200, 'Done.')
     def post(self, retailer_pid):
-        # list: product_pid and amount
-        launcher = LauncherModel.query.filter_by(
-            manufacture_pid=g.admin.manufacture_pid,
-            retailer_pid=retailer_pid,
-            is_active=True,
-        ).all()
-
-        if not launcher:
-            abort(404, 'Launcher with this retailer not found.')
-
-        success = False
-        contract = None
-
-        try:
-            with session() as s:
-                data = {
-                    "retailer_pid": retailer_pid,
-                    "products": {},
-                }
-
-                for n in launcher:
-                    # TODO УЧИТЫВАТЬ НЕУДАЧНЫЕ ПОПЫТКИ
-                    history = HistoryModel.query.filter_by(
-                        launcher_aid=n.aid,
-                    ).order_by(
-                        -HistoryModel.aid,
-                    ).first()
-
-                    if history is None or history.success:
-                        data['products'][n.product_pid] = n.amount
-                    else:
-                        data['products'][n.product_pid] = n.amount + history.amount
-
-                response = s.post(f'http://localhost:5002/import', json=data)
-
-                if response.status_code == 200:
-                    r_data = response.json()
-
-                    success = True
-                    contract = r_data['contract_aid']
-
-                    return {'contract_aid': contract}
-
-                abort(response.status_code, **response.json())
-
-        except (ConnectionError, ConnectTimeout):
-            abort(503, message='Could not get in touch with retailer service...')
-        finally:
-            for n in launcher:
-                db.session.add(HistoryModel(
-                    launcher_aid=n.aid,
-                    amount=data['products'][n.product_pid],
-                    success=success,
-                    contract=contract,
-                ))
-
-            db.session.commit()
+        key = idempotency_key('supply', g.admin.manufacture_pid, retailer_pid)
+
+        # A retry resends its first plan, so retailer service can replay it
+        if (plan := PlanModel.find(key)) is None:
+            plans = supply.plan(g.admin.manufacture_pid, retailer_pid)
+
+            if not plans:
+                abort(404, 'Launcher with this retailer not found.')
+
+            plan = plans[0]
+
+            if 'Idempotency-Key' in request.headers:
+                PlanModel.store(key, plan)
+                db.session.commit()
+
+        status, data = supply.dispatch(plan, key)
+
+        supply.record(plan, status == codes.ok, data.get('contract_aid'))
+        db.session.commit()
+
+        if status == codes.ok:
+            return {'contract_aid': data['contract_aid']}
+
+        abort(status, **data)
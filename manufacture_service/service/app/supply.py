@@ -0,0 +1,98 @@
+''' Supply of launchers to retailers, shared by POST /supply/<retailer_pid>
+    and the scheduled supply run (app.tasks).
+
+    A plan is a JSON-able dict of one (manufacture, retailer) group:
+
+        {
+            'manufacture_pid': 'hott_pizza',
+            'retailer_pid': 'cheeze_bank',
+            'products': {'gauda': 30, ...},       # Amounts with carry-over
+            'launchers': {'<aid>': 'gauda', ...},  # Launcher aid -> product
+        }
+'''
+from requests import codes
+from requests.exceptions import ConnectionError, Timeout
+
+from app import db, retailer
+from app.models.history import HistoryModel
+from app.models.launcher import LauncherModel
+
+
+def plan(manufacture_pid: str = None, retailer_pid: str = None) -> list:
+    ''' Return plans of all groups of active launchers (of manufacture and/or
+        retailer if given). Two queries however many launchers there are.
+    '''
+    query = LauncherModel.query.filter_by(is_active=True)
+
+    if manufacture_pid is not None:
+        query = query.filter_by(manufacture_pid=manufacture_pid)
+
+    if retailer_pid is not None:
+        query = query.filter_by(retailer_pid=retailer_pid)
+
+    launchers = query.order_by(LauncherModel.manufacture_pid, LauncherModel.retailer_pid).all()
+    latest = HistoryModel.latest([n.aid for n in launchers])
+    plans = {}
+
+    for n in launchers:
+        p = plans.setdefault((n.manufacture_pid, n.retailer_pid), {
+            'manufacture_pid': n.manufacture_pid,
+            'retailer_pid': n.retailer_pid,
+            'products': {},
+            'launchers': {},
+        })
+
+        # If the last attempt failed, its amount was not delivered
+        history = latest.get(n.aid)
+
+        if history is None or history.success:
+            p['products'][n.product_pid] = n.amount
+        else:
+            p['products'][n.product_pid] = n.amount + history.amount
+
+        p['launchers'][n.aid] = n.product_pid
+
+    return list(plans.values())
+
+
+def dispatch(plan: dict, key: str) -> tuple:
+    ''' Send plan to retailer service with Idempotency-Key key, return
+        (status code, response data). Unreachable retailer is 503, an answer
+        that is not a JSON object (proxy error pages...) keeps its error
+        status or is 502, 200 without contract_aid is 502 too.
+    '''
+    data = {'retailer_pid': plan['retailer_pid'], 'products': plan['products']}
+
+    try:
+        response = retailer.post('/import', key, json=data)
+
+    except (ConnectionError, Timeout):
+        return codes.service_unavailable, {'message': 'Could not get in touch with retailer service...'}
+
+    try:
+        data = response.json()
+
+    except ValueError:
+        data = None
+
+    if not isinstance(data, dict):
+        status = response.status_code if response.status_code >= 400 else codes.bad_gateway
+        return status, {'message': 'Retailer service sent invalid response.'}
+
+    if response.status_code == codes.ok and 'contract_aid' not in data:
+        return codes.bad_gateway, {'message': 'Retailer service sent invalid response.'}
+
+    return response.status_code, data
+
+
+def record(plan: dict, success: bool, contract: str = None) -> None:
+    '''Add history of the attempt to send plan (not commited).'''
+    db.session.add_all(
+        HistoryModel(
+            launcher_aid=aid,
+            amount=plan['products'][product_pid],
+            success=success,
+            contract=contract,
+        )
+        for aid, product_pid in plan['launchers'].items()
+    )
@@ -0,0 +1,135 @@
+''' Scheduled supply run (celery beat, every SUPPLY_RUN_INTERVAL seconds).
+
+    supply_run plans every group of active launchers (manufacture,
+    retailer) and fans them out as a chord: SUPPLY_CONCURRENCY chains of
+    supply_retailer tasks, so at most that many imports run at once whatever
+    the number of workers. Each task carries the result list of its chain.
+    summarize gets all of them and logs one summary of the run.
+
+    Beat does not wait for a run to finish. A run holds the 'supply-run'
+    lock (LockModel) from planning to its summary, a run started meanwhile
+    is skipped, so no group is supplied twice. The lock expires after
+    SUPPLY_RUN_TTL in case the run never gets to its summary.
+
+    A task that gets 5xx (or no answer) from retailer service retries with
+    jittered exponential backoff up to SUPPLY_RETRIES times, with the same
+    plan and Idempotency-Key, so a retry never imports twice. Then (or on 4xx)
+    the outcome goes to history and the chain goes on. An unexpected error
+    of a task counts as 500 of its group, it never breaks the chain.
+'''
+from datetime import datetime
+from hashlib import sha256
+from logging import getLogger
+from random import uniform
+from uuid import uuid4
+
+from celery import chain, chord, group
+from flask import current_app
+from requests import codes
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import celery, db, supply
+from app.models.lock import LockModel
+from app.models.plan import PlanModel
+
+logger = getLogger(__name__)
+
+
+def supply_key(run: str, plan: dict) -> str:
+    '''Idempotency-Key of plan in run.'''
+    return sha256(':'.join(('supply', run, plan['manufacture_pid'], plan['retailer_pid'])).encode()).hexdigest()
+
+
+@celery.task
+def supply_run() -> dict:
+    '''Plan supply of all active launchers and fan it out.'''
+    run, started = uuid4().hex, datetime.utcnow().isoformat()
+
+    if not LockModel.acquire('supply-run', run, current_app.config['SUPPLY_RUN_TTL']):
+        logger.info('Supply run skipped, previous one is not finished')
+        return {'run': None, 'started': started, 'groups': 0, 'summary': None}
+
+    plans = supply.plan()
+
+    width = current_app.config['SUPPLY_CONCURRENCY']
+    lanes = [plans[n::width] for n in range(min(width, len(plans)))]
+
+    if not lanes:
+        return summarize([], run, started)
+
+    result = chord(
+        group(
+            chain(
+                supply_retailer.s([], lane[0], supply_key(run, lane[0])),
+                *(supply_retailer.s(p, supply_key(run, p)) for p in lane[1:]),
+            )
+            for lane in lanes
+        ),
+        summarize.s(run, started),
+    ).delay()
+
+    return {'run': run, 'started': started, 'groups': len(plans), 'summary': result.id}
+
+
+@celery.task(bind=True)
+def supply_retailer(self, results: list, plan: dict, key: str) -> list:
+    '''Send plan, return results of the chain with its outcome added.'''
+    try:
+        status, data = supply.dispatch(plan, key)
+
+    except Exception:
+        logger.exception('Supply of %s to %s failed', plan['manufacture_pid'], plan['retailer_pid'])
+        status, data = codes.internal_server_error, {}
+
+    retries = self.request.retries
+
+    if status >= 500 and retries < (limit := current_app.config['SUPPLY_RETRIES']):
+        backoff = current_app.config['SUPPLY_RETRY_BACKOFF']
+        raise self.retry(countdown=uniform(0, backoff * 2 ** retries), max_retries=limit)
+
+    contract = data.get('contract_aid') if status == codes.ok else None
+
+    try:
+        supply.record(plan, status == codes.ok, contract)
+        db.session.commit()
+
+    except SQLAlchemyError:
+        logger.exception('History of %s to %s was not saved', plan['manufacture_pid'], plan['retailer_pid'])
+        db.session.rollback()
+
+    return results + [{
+        'manufacture_pid': plan['manufacture_pid'],
+        'retailer_pid': plan['retailer_pid'],
+        'status': status,
+        'contract_aid': contract,
+        'attempts': retries + 1,
+    }]
+
+
+@celery.task
+def summarize(lanes: list, run: str, started: str) -> dict:
+    '''One summary of all results of the run.'''
+    results = [r for lane in lanes for r in lane]
+    LockModel.release('supply-run', run)
+
+    summary = {
+        'run': run,
+        'started': started,
+        'finished': datetime.utcnow().isoformat(),
+        'groups': len(results),
+        'sent': sum(r['status'] == codes.ok for r in results),
+        'failed': sum(r['status'] != codes.ok for r in results),
+        'results': results,
+    }
+
+    logger.info('Supply run %s: %s of %s groups sent', run, summary['sent'], summary['groups'])
+    return summary
+
+
+@celery.task
+def expire_plans() -> int:
+    '''Delete plans of POST /supply kept longer than SUPPLY_KEY_TTL.'''
+    deleted = PlanModel.query.filter(PlanModel.datetime < PlanModel.expired_before()).delete(synchronize_session=False)
+    db.session.commit()
+
+    return deleted
@@ -1,4 +1,7 @@
+from contextlib import contextmanager
+
 import pytest
+from sqlalchemy import event
 
 from app import create_app, models, db as _db
 
@@ -46,3 +49,251 @@ def session(request, app, db):
 class Test_0:
     def test_0(self, client, session):
         assert True
+
+
+@contextmanager
+def count_queries():
+    '''Count SQL statements sent to DB inside the block.'''
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(_db.engine, 'before_cursor_execute', before_cursor_execute)
+    yield statements
+    event.remove(_db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+class Test_1_Supply:
+    def test_1_1_carry_over(self, client, session, monkeypatch):
+        from datetime import datetime, timedelta
+        from unittest.mock import Mock
+        from app import retailer
+
+        session.add(models.ManufactureModel(pid='supply_m', name='Supply M', address='str. One, 1', phone='123-123-11'))
+        session.add(models.AdminModel(pid='supply_admin', manufacture_pid='supply_m', login='supply_admin', password='aA#45678'))
+
+        launchers = {
+            retailer_pid: [
+                models.LauncherModel(
+                    manufacture_pid='supply_m',
+                    retailer_pid=retailer_pid,
+                    product_pid=f'{retailer_pid}_product_{n}',
+                    amount=10,
+                    is_active=True,
+                )
+                for n in range(size)
+            ]
+            for retailer_pid, size in (('small_r', 3), ('large_r', 999))
+        }
+        session.add_all(launchers['small_r'] + launchers['large_r'])
+        session.flush()
+
+        # Newer failure of 5 after older success of 7, and the other way round
+        first, second = launchers['small_r'][:2]
+        old, new = datetime.utcnow() - timedelta(hours=2), datetime.utcnow() - timedelta(hours=1)
+        session.add_all([
+            models.HistoryModel(launcher_aid=first.aid, amount=7, success=True, datetime=old),
+            models.HistoryModel(launcher_aid=first.aid, amount=5, success=False, datetime=new),
+            models.HistoryModel(launcher_aid=second.aid, amount=5, success=False, datetime=old),
+            models.HistoryModel(launcher_aid=second.aid, amount=7, success=True, datetime=new),
+        ])
+        session.commit()
+
+        sent = []
+
+        def post(path, idempotency_key=None, json=None, **kwargs):
+            sent.append(json)
+            return Mock(status_code=200, json=lambda: {'contract_aid': f'contract_{len(sent)}'})
+
+        monkeypatch.setattr(retailer, 'post', post)
+
+        auth = ('supply_admin', 'aA#45678')
+        client.get('/launchers', auth=auth)  # Password check cached
+
+        with count_queries() as small:
+            assert client.post('/supply/small_r', auth=auth).status_code == 200
+
+        with count_queries() as large:
+            assert client.post('/supply/large_r', auth=auth).status_code == 200
+
+        assert sent[0]['products'] == {'small_r_product_0': 15, 'small_r_product_1': 10, 'small_r_product_2': 10}
+        assert len(sent[1]['products']) == 999
+        assert len(large) == len(small)
+
+        latest = models.HistoryModel.latest([first.aid])
+        assert latest[first.aid].contract == 'contract_1'
+
+    def test_1_2_retry_replays(self, client, session, monkeypatch):
+        from unittest.mock import Mock
+        from requests.exceptions import Timeout
+        from app import retailer
+
+        session.add(models.ManufactureModel(pid='replay_m', name='Replay M', address='str. Five, 5', phone='123-123-55'))
+        session.add(models.AdminModel(pid='replay_admin', manufacture_pid='replay_m', login='replay_admin', password='aA#45678'))
+        session.add(models.LauncherModel(manufacture_pid='replay_m', retailer_pid='replay_r', product_pid='replay_p', amount=10, is_active=True))
+        session.commit()
+
+        # Retailer service: commits the first import, but the answer is lost
+        imported, answers = {}, iter(['timeout'])
+
+        def post(path, idempotency_key=None, json=None, **kwargs):
+            if idempotency_key in imported and imported[idempotency_key] != json:
+                return Mock(status_code=422, json=lambda: {'message': 'Idempotency-Key was used with another request.'})
+
+            imported.setdefault(idempotency_key, json)
+
+            if next(answers, None) == 'timeout':
+                raise Timeout()
+
+            return Mock(status_code=200, json=lambda: {'contract_aid': 'contract_replay'})
+
+        monkeypatch.setattr(retailer, 'post', post)
+
+        auth, headers = ('replay_admin', 'aA#45678'), {'Idempotency-Key': 'supply-1'}
+        assert client.post('/supply/replay_r', auth=auth, headers=headers).status_code == 503
+
+        r = client.post('/supply/replay_r', auth=auth, headers=headers)
+        assert r.status_code == 200
+        assert r.json == {'contract_aid': 'contract_replay'}
+        assert [p['products'] for p in imported.values()] == [{'replay_p': 10}]
+
+        launcher = models.LauncherModel.query.filter_by(retailer_pid='replay_r').first()
+        assert models.HistoryModel.latest([launcher.aid])[launcher.aid].success
+
+
+@pytest.fixture
+def supply_celery(app, monkeypatch):
+    '''Celery running tasks eagerly in memory, config restored after test.'''
+    from app import celery
+
+    for name, value in (
+        ('broker_url', 'memory://'),
+        ('result_backend', 'cache+memory://'),
+        ('task_always_eager', True),
+        ('task_store_eager_result', True),
+    ):
+        monkeypatch.setitem(celery.conf, name, value)
+
+    monkeypatch.setitem(app.config, 'SUPPLY_CONCURRENCY', 2)
+    monkeypatch.setitem(app.config, 'SUPPLY_RETRY_BACKOFF', 0)
+
+    return celery
+
+
+class Test_2_SupplyRun:
+    def test_2_1_run(self, client, session, monkeypatch, supply_celery):
+        from unittest.mock import Mock
+        from app import retailer
+        from app.tasks import supply_run
+
+        session.add(models.ManufactureModel(pid='run_m', name='Run M', address='str. Two, 2', phone='123-123-22'))
+        session.add_all(
+            models.LauncherModel(manufacture_pid='run_m', retailer_pid=f'run_r{r}', product_pid=f'run_r{r}_p{n}', amount=5, is_active=True)
+            for r in range(5)
+            for n in range(3)
+        )
+        session.commit()
+
+        calls, keys = [], {}
+
+        def post(path, idempotency_key=None, json=None, **kwargs):
+            retailer_pid = json['retailer_pid']
+            calls.append(retailer_pid)
+            keys.setdefault(retailer_pid, set()).add(idempotency_key)
+
+            if retailer_pid == 'run_r1' and calls.count('run_r1') < 3:
+                return Mock(status_code=503, json=lambda: {'message': 'Try later.'})
+
+            if retailer_pid == 'run_r2':
+                return Mock(status_code=400, json=lambda: {'message': 'Unknown products.'})
+
+            return Mock(status_code=200, json=lambda: {'contract_aid': f'contract_{retailer_pid}'})
+
+        monkeypatch.setattr(retailer, 'post', post)
+
+        started = supply_run.delay().get()
+        summary = supply_celery.AsyncResult(started['summary']).get()
+
+        # Supply of run_m only, other tests add their own launchers
+        results = {r['retailer_pid']: r for r in summary['results'] if r['manufacture_pid'] == 'run_m'}
+        assert set(results) == {f'run_r{r}' for r in range(5)}
+        assert results['run_r1'] == {**results['run_r1'], 'status': 200, 'attempts': 3}
+        assert results['run_r2']['status'] == 400
+        assert len(keys['run_r1']) == 1  # Retries with the same Idempotency-Key
+
+        history = models.HistoryModel.query.join(models.LauncherModel).filter(models.LauncherModel.retailer_pid == 'run_r1').all()
+        assert len(history) == 3
+        assert all(h.success and h.contract == 'contract_run_r1' for h in history)
+
+    def test_2_2_invalid_response(self, client, session, monkeypatch, supply_celery):
+        from unittest.mock import Mock
+        from app import retailer
+        from app.tasks import supply_run
+
+        session.add(models.ManufactureModel(pid='bad_m', name='Bad M', address='str. Three, 3', phone='123-123-33'))
+        session.add(models.AdminModel(pid='bad_admin', manufacture_pid='bad_m', login='bad_admin', password='aA#45678'))
+        session.add_all(
+            models.LauncherModel(manufacture_pid='bad_m', retailer_pid=f'bad_r{r}', product_pid=f'bad_r{r}_p', amount=5, is_active=True)
+            for r in range(3)
+        )
+        session.commit()
+
+        def html():
+            raise ValueError('Expecting value')
+
+        def post(path, idempotency_key=None, json=None, **kwargs):
+            if json['retailer_pid'] == 'bad_r0':
+                return Mock(status_code=502, json=html)  # Proxy error page
+
+            if json['retailer_pid'] == 'bad_r1':
+                raise RuntimeError('Unexpected')
+
+            return Mock(status_code=200, json=lambda: {'contract_aid': 'contract_bad_r2'})
+
+        monkeypatch.setattr(retailer, 'post', post)
+
+        r = client.post('/supply/bad_r0', auth=('bad_admin', 'aA#45678'))
+        assert r.status_code == 502
+
+        started = supply_run.delay().get()
+        summary = supply_celery.AsyncResult(started['summary']).get()
+
+        results = {r['retailer_pid']: r['status'] for r in summary['results'] if r['manufacture_pid'] == 'bad_m'}
+        assert results == {'bad_r0': 502, 'bad_r1': 500, 'bad_r2': 200}
+
+        history = models.HistoryModel.query.join(models.LauncherModel).filter(models.LauncherModel.retailer_pid == 'bad_r0').all()
+        assert [h.success for h in history] == [False, False]
+
+    def test_2_3_overlap(self, app, client, session, monkeypatch, supply_celery):
+        from datetime import datetime, timedelta
+        from unittest.mock import Mock
+        from app import retailer
+        from app.tasks import supply_run
+
+        session.add(models.ManufactureModel(pid='lock_m', name='Lock M', address='str. Four, 4', phone='123-123-44'))
+        session.add(models.LauncherModel(manufacture_pid='lock_m', retailer_pid='lock_r', product_pid='lock_p', amount=5, is_active=True))
+        session.commit()
+
+        calls = []
+
+        def post(path, idempotency_key=None, json=None, **kwargs):
+            calls.append(json['retailer_pid'])
+            return Mock(status_code=200, json=lambda: {'contract_aid': 'contract'})
+
+        monkeypatch.setattr(retailer, 'post', post)
+
+        # Previous run still going
+        assert models.LockModel.acquire('supply-run', 'previous', 60)
+        assert supply_run.delay().get()['run'] is None
+        assert calls == []
+
+        # Previous run crashed long ago
+        session.query(models.LockModel).update({'expires': datetime.utcnow() - timedelta(seconds=1)})
+        session.commit()
+
+        started = supply_run.delay().get()
+        assert started['run'] is not None
+        assert 'lock_r' in calls
+
+        assert session.get(models.LockModel, 'supply-run') is None
@@ -0,0 +1,7 @@
+''' Celery worker and beat of manufacture service:
+
+    celery -A worker.celery worker --beat --loglevel=info
+'''
+from app import celery, create_app
+
+app = create_app()
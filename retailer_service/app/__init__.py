@@ -1,9 +1,14 @@
 from flask import Flask, Blueprint
 from flask_restx import Api
-from flask_httpauth import HTTPBasicAuth
+from flask_httpauth import HTTPBasicAuth, HTTPTokenAuth, MultiAuth
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 
+from app.cache import CatalogCache
+from app.compress import Compress
+from app.credentials import CredentialCache
+from app.rows import ROWS, output_rows
+
 api_bp = Blueprint('api', __name__)
 api = Api(
     api_bp,
@@ -12,9 +17,15 @@ api = Api(
     description='Manage retailers and admins. Read lists of retailers, their '
                 'sections and products. Import and buy products.',
 )
-auth = HTTPBasicAuth()
+api.representation(ROWS)(output_rows)
+basic_auth = HTTPBasicAuth()
+token_auth = HTTPTokenAuth(scheme='Bearer')
+auth = MultiAuth(basic_auth, token_auth)
 db = SQLAlchemy()
 migrate = Migrate()
+catalog = CatalogCache()
+compress = Compress()
+credentials = CredentialCache()
 
 
 def create_app():
@@ -23,12 +34,17 @@ def create_app():
 
     db.init_app(app)
     migrate.init_app(app, db)
+    catalog.init_app(app)
+    compress.init_app(app)
+    credentials.init_app(app)
 
     from app.models import models
     from app.resources import resources
+    from app.commands import commands
 
     app.register_blueprint(models)
     app.register_blueprint(resources)
+    app.register_blueprint(commands)
     app.register_blueprint(api_bp)
 
     return app
@@ -0,0 +1,191 @@
+''' In-process LRU cache and ETags of public catalog responses.
+
+    Every cached list has a tag with a version counter in DB (VersionModel):
+
+        'retailers'           - list of retailers
+        'retailer:<pid>'      - list of sections of the retailer
+        'section:<pid>'       - list of products of the section
+        'contracts'           - every contract (see immutable)
+
+    Writers bump tags they touch in the same DB transaction as the change,
+    except stock writes (import, buy): they bump right after their commit in
+    a short transaction of its own, version rows are hot and holding them
+    locked with stock rows would serialize all buys of a section. Lists can
+    show the old stock until that bump.
+    A GET reads versions of its tags (one PK lookup), that is its ETag and a
+    part of the cache key. So If-None-Match is answered with 304 before any
+    other query, and entries of every worker go stale together (old versions
+    are never asked for again and fall out of the LRU).
+
+    Authorized requests (admins can see inactive items) get their own ETags
+    and are never stored. Rows (app/rows.py) get their own ETags too, every
+    response has Vary: Accept.
+'''
+from collections import OrderedDict
+from functools import wraps
+from threading import Lock
+
+from flask import Response, current_app, g, request
+from sqlalchemy.exc import OperationalError
+from werkzeug.http import quote_etag
+
+
+def negotiated(etag: str) -> str:
+    ''' Return etag of the representation the request gets: rows and JSON of
+        the same data differ, so they can not share a strong ETag.
+    '''
+    from app import api
+
+    mediatype = request.accept_mimetypes.best_match(api.representations, default=api.default_mediatype)
+
+    if mediatype == api.default_mediatype:
+        return etag
+
+    return f"{etag}-{mediatype.rpartition('/')[2]}"
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status=304, headers={'ETag': quote_etag(etag), 'Vary': 'Accept'})
+
+
+def with_etag(value, etag: str):
+    '''Add ETag header to view return value (data or (data, code, headers)).'''
+    if not isinstance(value, tuple):
+        value = (value, 200, {})
+
+    data, code, headers = (value + ({}, ))[:3]
+    return data, code, {**headers, 'ETag': quote_etag(etag), 'Vary': 'Accept'}
+
+
+def immutable(argument: str, tag: str):
+    ''' Decorator for GET views of rows that are never edited once created
+        (like contracts), but can go away or change with a cascade of
+        another delete. ETag is the view argument plus version of tag, bump
+        it on such deletes. Put it above marshal_with: 304 costs one PK
+        lookup.
+    '''
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            from app.models import VersionModel
+
+            etag = negotiated(f'{kwargs[argument]}.{VersionModel.get([tag])[tag]}')
+
+            if request.if_none_match.contains_weak(etag):
+                return not_modified(etag)
+
+            return with_etag(f(*args, **kwargs), etag)
+
+        return wrapper
+
+    return decorator
+
+
+class CatalogCache:
+    def __init__(self, size: int = 1024):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()  # key -> value
+        self._lock = Lock()
+
+    def init_app(self, app):
+        self.size = app.config['CATALOG_CACHE_SIZE']
+
+    def get(self, key):
+        '''Return cached value or None.'''
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *tags):
+        ''' Bump versions of tags. Call it before commit, bumps are a part of
+            the DB transaction.
+        '''
+        from app.models import VersionModel
+
+        VersionModel.bump(set(tags))
+
+    def invalidate_commited(self, *tags):
+        ''' Bump versions of tags of an already commited change and commit,
+            retried on lock conflicts. Never fails: the change itself is
+            done, a lost bump only leaves lists stale until the next one.
+        '''
+        from app import db
+
+        for _ in range(current_app.config['WRITE_RETRIES'] + 1):
+            try:
+                self.invalidate(*tags)
+                db.session.commit()
+                return
+
+            except OperationalError:
+                db.session.rollback()
+
+        current_app.logger.warning('Versions of %s were not bumped.', ', '.join(sorted(tags)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self._entries),
+            'size': self.size,
+        }
+
+    def cached(self, *tags):
+        ''' Decorator for GET views, tags are formated with view arguments:
+            @catalog.cached('section:{section_pid}')
+        '''
+        def decorator(f):
+            @wraps(f)
+            def wrapper(*args, **kwargs):
+                from app.models import VersionModel
+
+                versions = VersionModel.get([tag.format(**kwargs) for tag in tags])
+                etag = '.'.join(str(v) for v in versions.values())
+
+                if authorized := 'Authorization' in request.headers:
+                    etag += f"-{getattr(g, 'admin', None) and g.admin.retailer_pid}"
+
+                etag = negotiated(etag)
+
+                if request.if_none_match.contains_weak(etag):
+                    return not_modified(etag)
+
+                if authorized:
+                    return with_etag(f(*args, **kwargs), etag)
+
+                key = (
+                    request.endpoint,
+                    tuple(sorted(kwargs.items())),
+                    tuple(sorted(request.args.items(multi=True))),
+                    etag,
+                )
+
+                if (value := self.get(key)) is None:
+                    value = with_etag(f(*args, **kwargs), etag)
+                    self.set(key, value)
+
+                return value
+
+            return wrapper
+
+        return decorator
@@ -0,0 +1,165 @@
+''' Maintenance commands, run them as `flask stock <command>`.
+'''
+from datetime import datetime, timedelta
+
+import click
+from flask import Blueprint
+from sqlalchemy import delete, func, insert, literal, select, union_all
+
+from app import db
+from app.models import (
+    CheckpointModel, ContractModel, IdempotencyModel, ProductModel,
+    StockModel, TransactionArchiveModel, TransactionModel,
+)
+
+commands = Blueprint('commands', __name__, cli_group='stock')
+
+
+def last_checkpoint(at: datetime = None) -> datetime:
+    '''Return datetime of the latest checkpoint (at or before at) or None.'''
+    query = db.session.query(func.max(CheckpointModel.datetime))
+    if at is not None:
+        query = query.filter(CheckpointModel.datetime <= at)
+
+    return query.scalar()
+
+
+def ledger_totals(at: datetime = None):
+    ''' Return subquery (product_pid, amount) of stock up to at (or up to
+        now), computed as the latest checkpoint + transactions after it.
+    '''
+    checkpoint = last_checkpoint(at)
+
+    tail = select(
+        TransactionModel.product_pid, TransactionModel.amount,
+    ).join(
+        ContractModel, ContractModel.aid == TransactionModel.contract_aid,
+    )
+    if checkpoint is not None:
+        tail = tail.where(ContractModel.datetime > checkpoint)
+    if at is not None:
+        tail = tail.where(ContractModel.datetime <= at)
+
+    base = select(
+        CheckpointModel.product_pid, CheckpointModel.amount,
+    ).where(
+        CheckpointModel.datetime == checkpoint,
+    )
+
+    rows = union_all(base, tail).subquery()
+
+    return select(
+        rows.c.product_pid, func.sum(rows.c.amount).label('amount'),
+    ).group_by(
+        rows.c.product_pid,
+    ).subquery()
+
+
+def rebuild_stock() -> int:
+    '''Recompute every StockModel balance from the ledger. Return number of
+    products.'''
+    totals = ledger_totals()
+    balances = (
+        select(ProductModel.pid, func.coalesce(totals.c.amount, 0)).
+        outerjoin(totals, totals.c.product_pid == ProductModel.pid)
+    )
+
+    db.session.execute(delete(StockModel))
+    result = db.session.execute(
+        insert(StockModel).from_select(['product_pid', 'amount'], balances)
+    )
+    db.session.commit()
+
+    return result.rowcount
+
+
+def make_checkpoint(at: datetime) -> int:
+    '''Store stock of every product up to at. Return number of products.'''
+    if (checkpoint := last_checkpoint()) is not None and checkpoint >= at:
+        raise ValueError(f'There is a later checkpoint already ({checkpoint}).')
+
+    totals = ledger_totals(at)
+    balances = (
+        select(ProductModel.pid, literal(at, db.DateTime), func.coalesce(totals.c.amount, 0)).
+        outerjoin(totals, totals.c.product_pid == ProductModel.pid)
+    )
+
+    result = db.session.execute(
+        insert(CheckpointModel).from_select(['product_pid', 'datetime', 'amount'], balances)
+    )
+    db.session.commit()
+
+    return result.rowcount
+
+
+def compact_ledger() -> int:
+    ''' Move transactions covered by the latest checkpoint to the archive and
+        drop older checkpoints. Return number of moved transactions.
+    '''
+    if (checkpoint := last_checkpoint()) is None:
+        return 0
+
+    covered = select(ContractModel.aid).where(ContractModel.datetime <= checkpoint)
+    columns = ['aid', 'product_pid', 'contract_aid', 'sold_at', 'amount']
+
+    db.session.execute(
+        insert(TransactionArchiveModel).from_select(
+            columns,
+            select(*(getattr(TransactionModel, n) for n in columns)).
+            where(TransactionModel.contract_aid.in_(covered)),
+        )
+    )
+    result = db.session.execute(
+        delete(TransactionModel).
+        where(TransactionModel.contract_aid.in_(covered)).
+        execution_options(synchronize_session=False)
+    )
+    db.session.execute(
+        delete(CheckpointModel).
+        where(CheckpointModel.datetime < checkpoint)
+    )
+    db.session.commit()
+
+    return result.rowcount
+
+
+def expire_keys() -> int:
+    '''Delete expired idempotency keys. Return their number.'''
+    result = db.session.execute(
+        delete(IdempotencyModel).
+        where(IdempotencyModel.datetime < IdempotencyModel.expired_before()).
+        execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+    return result.rowcount
+
+
+@commands.cli.command('rebuild')
+def rebuild():
+    '''Recompute stock balances from checkpoint and transactions.'''
+    click.echo(f'Rebuilt stock of {rebuild_stock()} products.')
+
+
+@commands.cli.command('checkpoint')
+@click.option('--lag', default=60, show_default=True, help='Minutes back from now, leaves room for contracts still being commited.')
+def checkpoint(lag):
+    '''Store stock of every product up to now - lag.'''
+    at = datetime.utcnow() - timedelta(minutes=lag)
+
+    try:
+        click.echo(f'Checkpoint at {at} for {make_checkpoint(at)} products.')
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+
+@commands.cli.command('compact')
+def compact():
+    '''Archive transactions covered by the latest checkpoint.'''
+    click.echo(f'Archived {compact_ledger()} transactions.')
+
+
+@commands.cli.command('expire-keys')
+def expire_keys_command():
+    '''Delete idempotency keys older than IDEMPOTENCY_TTL.'''
+    click.echo(f'Deleted {expire_keys()} idempotency keys.')
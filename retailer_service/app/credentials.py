@@ -0,0 +1,97 @@
+''' In-process cache of verified HTTP Basic credentials.
+
+    Checking a password hash (PBKDF2) costs much more than the request it
+    guards. Once login and password were checked, a keyed digest of them
+    (HMAC with a random key of this process, the password itself is never
+    kept) is remembered with the password hash of the account for
+    AUTH_CACHE_TTL seconds. A repeated request only compares that snapshot
+    with the hash just loaded, so a password changed by any worker (or a
+    deleted account) stops matching at once. PATCH and DELETE handlers also
+    forget the login explicitly.
+
+    Passwords are hashed with PASSWORD_HASH_METHOD (werkzeug method string
+    with its cost, like 'pbkdf2:sha256:260000'). A hash made with another
+    method or cost is replaced on the next successful login.
+'''
+from collections import OrderedDict
+from functools import lru_cache
+from hashlib import sha256
+from hmac import compare_digest, new
+from os import urandom
+from threading import Lock
+from time import monotonic
+
+from flask import current_app
+from werkzeug.security import generate_password_hash
+
+
+def hash_password(password: str) -> str:
+    return generate_password_hash(password, current_app.config['PASSWORD_HASH_METHOD'])
+
+
+def needs_rehash(password_hash: str) -> bool:
+    '''True if password_hash was not made with PASSWORD_HASH_METHOD.'''
+    return password_hash.split('$', 1)[0] != _prefix(current_app.config['PASSWORD_HASH_METHOD'])
+
+
+@lru_cache(maxsize=4)
+def _prefix(method: str) -> str:
+    '''Method part of hashes made with method, defaults filled in.'''
+    return generate_password_hash('', method).split('$', 1)[0]
+
+
+class CredentialCache:
+    def __init__(self):
+        self.ttl = 300
+        self.size = 1024
+        self.hits = 0
+        self.misses = 0
+
+        self._key = urandom(32)
+        self._entries = OrderedDict()  # digest -> (login, password_hash, expires)
+        self._lock = Lock()
+
+    def init_app(self, app):
+        self.ttl = app.config['AUTH_CACHE_TTL']
+        self.size = app.config['AUTH_CACHE_SIZE']
+
+    def verify(self, login: str, password: str, password_hash: str, check) -> bool:
+        ''' Return True if password is the one of password_hash. check(password)
+            does the real hash check, it is called on cache misses only.
+        '''
+        digest = new(self._key, f'{login}\0{password}'.encode(), sha256).digest()
+
+        with self._lock:
+            entry = self._entries.get(digest)
+
+        if (
+            entry is not None
+            and entry[2] > monotonic()
+            and compare_digest(entry[1], password_hash)
+        ):
+            self.hits += 1
+            return True
+
+        self.misses += 1
+
+        if not check(password):
+            return False
+
+        with self._lock:
+            self._entries[digest] = (login, password_hash, monotonic() + self.ttl)
+            self._entries.move_to_end(digest)
+
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+        return True
+
+    def forget(self, login: str):
+        '''Drop all entries of login.'''
+        with self._lock:
+            for digest in [d for d, entry in self._entries.items() if entry[0] == login]:
+                del self._entries[digest]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -16,5 +16,10 @@ from .retailer import RetailerModel
 from .admin import AdminModel              # r RetailerModel <-- a AdminModel
 from .section import SectionModel          # r RetailerModel <-- s SectionModel
 from .product import ProductModel          # r RetailerModel <-- s SectionModel <-- p ProductModel
+from .stock import StockModel              # p ProductModel <-- st StockModel
 from .contract import ContractModel        # r RetailerModel <-- c ContractModel
 from .transaction import TransactionModel  # c ContractModel <-- t TransactionModel --> p ProductModel
+from .archive import TransactionArchiveModel  # c ContractModel <-- ta TransactionArchiveModel --> p ProductModel
+from .checkpoint import CheckpointModel    # p ProductModel <-- cp CheckpointModel
+from .version import VersionModel          # catalog cache versions
+from .idempotency import IdempotencyModel  # c ContractModel <-- i IdempotencyModel
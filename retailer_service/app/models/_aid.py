@@ -1,13 +1,19 @@
-from random import choices
-from string import ascii_letters, digits
+from os import urandom
+from time import time_ns
+
+# Crockford's base32, keys sort the same way as numbers they encode
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
 
 
 class Aid:
     ''' Sort of *generate-me-aid* mixin. Has only static method
-        generate_key(length).
+        generate_key().
     '''
     @staticmethod
-    def generate_key(length: int) -> str:
-        '''Return str of ascii_letters + digits, len = length.'''
-        alphabet = ascii_letters + digits
-        return ''.join(choices(alphabet, k=length))
+    def generate_key() -> str:
+        ''' Return ULID-like str of 26 chars: 48 bit unix time in ms and 80
+            random bits from os.urandom. Later keys sort after earlier ones,
+            so new rows go to the end of primary key index.
+        '''
+        n = (time_ns() // 1_000_000) << 80 | int.from_bytes(urandom(10), 'big')
+        return ''.join(ALPHABET[(n >> shift) & 31] for shift in range(125, -1, -5))
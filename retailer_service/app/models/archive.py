@@ -0,0 +1,15 @@
+from app import db
+
+
+class TransactionArchiveModel(db.Model):
+    ''' Transactions moved out of TransactionModel by `flask stock compact`.
+        Same columns, but nothing reads them except contract lookups, stock
+        is covered by CheckpointModel.
+    '''
+    aid = db.Column(db.String(32), primary_key=True)
+
+    product_pid = db.Column(db.String(32), db.ForeignKey('product_model.pid', onupdate='CASCADE', ondelete='CASCADE'), nullable=False)
+    contract_aid = db.Column(db.String(32), db.ForeignKey('contract_model.aid', onupdate='CASCADE', ondelete='CASCADE'), nullable=False, index=True)
+
+    sold_at = db.Column(db.Integer, default=None)
+    amount = db.Column(db.Integer, nullable=False)
@@ -0,0 +1,13 @@
+from app import db
+
+
+class CheckpointModel(db.Model):
+    ''' Stock of a product up to datetime: sum of transactions of contracts
+        made at or before it. Current stock = checkpoint + transactions of
+        later contracts. Made by `flask stock checkpoint`, for all products
+        at once with the same datetime.
+    '''
+    product_pid = db.Column(db.String(32), db.ForeignKey('product_model.pid', onupdate='CASCADE', ondelete='CASCADE'), primary_key=True)
+    datetime = db.Column(db.DateTime, primary_key=True, index=True)
+
+    amount = db.Column(db.Integer, nullable=False)
@@ -9,13 +9,20 @@ class ContractModel(db.Model, Aid):
     retailer_pid = db.Column(db.String(32), db.ForeignKey('retailer_model.pid', onupdate='CASCADE', ondelete='CASCADE'), nullable=False)
 
     pay_method = db.Column(db.String(32))
-    datetime = db.Column(db.DateTime, default=datetime.utcnow())
+    datetime = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
     transactions = db.relationship('TransactionModel', backref='contact_model', passive_deletes=True)
+    archived_transactions = db.relationship('TransactionArchiveModel', passive_deletes=True)
 
     def __init__(self, **kwargs):
         db.Model.__init__(self, **kwargs)
-        self.aid = self.generate_key(32)
+        self.aid = self.generate_key()
+
+    # Compaction moves all transactions of a contract at once, so only one of
+    # these lists is not empty
+    @property
+    def ledger(self):
+        return self.transactions + self.archived_transactions
 
     @staticmethod
     def get_pay_methods():
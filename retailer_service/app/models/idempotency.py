@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy.orm import joinedload
+
+from app import db
+from .contract import ContractModel
+
+
+class IdempotencyModel(db.Model):
+    ''' Idempotency-Key of a commited /buy or /import and its contract. It is
+        stored in the same DB transaction as the contract, so a replayed
+        request finds either both or none. Keys expire after IDEMPOTENCY_TTL,
+        `flask stock expire-keys` deletes them.
+    '''
+    key = db.Column(db.String(64), primary_key=True)
+    contract_aid = db.Column(db.String(32), db.ForeignKey('contract_model.aid', onupdate='CASCADE', ondelete='CASCADE'), nullable=False)
+
+    fingerprint = db.Column(db.String(64), nullable=False)  # sha256 of request body
+    datetime = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    contract = db.relationship('ContractModel')
+
+    @staticmethod
+    def find(key: str):
+        '''Return row of key with contract and transactions, one query.'''
+        return IdempotencyModel.query.options(
+            joinedload(IdempotencyModel.contract).joinedload(ContractModel.transactions),
+            joinedload(IdempotencyModel.contract).joinedload(ContractModel.archived_transactions),
+        ).filter_by(
+            key=key,
+        ).first()
+
+    @staticmethod
+    def expired_before() -> datetime:
+        return datetime.utcnow() - timedelta(seconds=current_app.config['IDEMPOTENCY_TTL'])
+
+    @property
+    def expired(self) -> bool:
+        return self.datetime < self.expired_before()
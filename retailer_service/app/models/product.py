@@ -1,9 +1,8 @@
-from select import select
-from sqlalchemy import func
+from sqlalchemy import func, select
 from sqlalchemy.ext.hybrid import hybrid_property
 
 from app import db
-from app.models.transaction import TransactionModel
+from app.models.stock import StockModel
 
 
 class ProductModel(db.Model):
@@ -17,22 +16,29 @@ class ProductModel(db.Model):
 
     section = db.relationship('SectionModel', backref='product_model', uselist=False)
     transactions = db.relationship('TransactionModel', backref='product_model', passive_deletes=True)
+    stock = db.relationship('StockModel', uselist=False, lazy='joined', cascade='all, delete-orphan', passive_deletes=True)
 
     # Name and about must be unique *inside* a section
     __table_args__ = (
         db.UniqueConstraint('section_pid', 'name'),
         db.UniqueConstraint('section_pid', 'about'),
+        db.Index('ix_product_model_section_pid_pid', 'section_pid', 'pid'),  # Pages
     )
 
+    def __init__(self, **kwargs):
+        db.Model.__init__(self, **kwargs)
+        self.stock = StockModel(amount=0)
+
     # Easy acces to current stock count
     @hybrid_property
     def in_stock(self):
-        return sum(t.amount for t in self.transactions)
+        return self.stock.amount if self.stock else 0
 
     @in_stock.expression
     def in_stock(cls):
-        return (
-            select([func.sum(TransactionModel.amount)]).
-            where(TransactionModel.item_id == cls.id).
-            label('in_stock')
-        )
+        return func.coalesce(
+            select(StockModel.amount).
+            where(StockModel.product_pid == cls.pid).
+            scalar_subquery(),
+            0,
+        ).label('in_stock')
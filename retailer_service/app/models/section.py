@@ -22,4 +22,5 @@ class SectionModel(db.Model):
     __table_args__ = (
         db.UniqueConstraint('retailer_pid', 'name'),
         db.UniqueConstraint('retailer_pid', 'about'),
+        db.Index('ix_section_model_retailer_pid_pid', 'retailer_pid', 'pid'),  # Pages
     )
@@ -0,0 +1,57 @@
+from sqlalchemy import case, update
+
+from app import db
+
+
+class StockModel(db.Model):
+    ''' Materialized stock balance of a product. It is a sum of all product
+        transactions, kept up to date by every writer of TransactionModel in
+        the same DB transaction. Can be recomputed with `flask stock rebuild`.
+    '''
+    product_pid = db.Column(db.String(32), db.ForeignKey('product_model.pid', onupdate='CASCADE', ondelete='CASCADE'), primary_key=True)
+
+    amount = db.Column(db.Integer, nullable=False, default=0)
+
+    @staticmethod
+    def add(deltas: dict[str, int]) -> None:
+        '''Add {product_pid: delta, ...} to balances with one UPDATE.'''
+        if not deltas:
+            return
+
+        result = db.session.execute(
+            update(StockModel).
+            where(StockModel.product_pid.in_(deltas)).
+            values(amount=StockModel.amount + case(deltas, value=StockModel.product_pid)).
+            execution_options(synchronize_session=False)
+        )
+
+        if result.rowcount == len(deltas):
+            return
+
+        # Products created before balances existed, rebuild will fix the
+        # rest of them
+        known = {
+            pid for pid, in db.session.query(StockModel.product_pid).
+            filter(StockModel.product_pid.in_(deltas))
+        }
+        db.session.add_all(
+            StockModel(product_pid=pid, amount=delta)
+            for pid, delta in deltas.items() if pid not in known
+        )
+
+    @staticmethod
+    def reserve(demand: dict[str, int]) -> bool:
+        ''' Take {product_pid: amount, ...} from balances with one conditional
+            UPDATE. Return False if any product is short, then nothing must
+            be commited (caller rolls back).
+        '''
+        amount = case(demand, value=StockModel.product_pid)
+
+        result = db.session.execute(
+            update(StockModel).
+            where(StockModel.product_pid.in_(demand), StockModel.amount >= amount).
+            values(amount=StockModel.amount - amount).
+            execution_options(synchronize_session=False)
+        )
+
+        return result.rowcount == len(demand)
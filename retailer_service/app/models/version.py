@@ -0,0 +1,71 @@
+from sqlalchemy import update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from app import db
+
+
+class VersionModel(db.Model):
+    '''Version counter of a cached catalog list, see app/cache.py.'''
+    tag = db.Column(db.String(64), primary_key=True)
+
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    @staticmethod
+    def get(tags: list[str]) -> dict[str, int]:
+        '''Return {tag: version, ...} with one SELECT, 0 for never bumped.'''
+        versions = dict(
+            db.session.query(VersionModel.tag, VersionModel.version).
+            filter(VersionModel.tag.in_(tags))
+        )
+
+        return {tag: versions.get(tag, 0) for tag in tags}
+
+    @staticmethod
+    def bump(tags: set[str]) -> None:
+        ''' Increment versions of tags (insert missing ones with 1) with one
+            upsert, concurrent first bumps of a tag do not conflict.
+        '''
+        if not tags:
+            return
+
+        rows = [{'tag': tag, 'version': 1} for tag in sorted(tags)]
+        dialect = db.engine.dialect.name
+
+        if dialect == 'mysql':
+            statement = mysql.insert(VersionModel).values(rows)
+            statement = statement.on_duplicate_key_update(version=VersionModel.version + 1)
+
+        elif dialect in ('sqlite', 'postgresql'):
+            insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+            statement = insert(VersionModel).values(rows).on_conflict_do_update(
+                index_elements=[VersionModel.tag],
+                set_={'version': VersionModel.version + 1},
+            )
+
+        else:
+            VersionModel._bump(tags)
+            return
+
+        db.session.execute(statement)
+
+    @staticmethod
+    def _bump(tags: set[str]) -> None:
+        '''bump() of databases without upsert: UPDATE, then insert missing.'''
+        result = db.session.execute(
+            update(VersionModel).
+            where(VersionModel.tag.in_(tags)).
+            values(version=VersionModel.version + 1).
+            execution_options(synchronize_session=False)
+        )
+
+        if result.rowcount == len(tags):
+            return
+
+        known = {
+            tag for tag, in db.session.query(VersionModel.tag).
+            filter(VersionModel.tag.in_(tags))
+        }
+        db.session.add_all(
+            VersionModel(tag=tag, version=1)
+            for tag in tags if tag not in known
+        )
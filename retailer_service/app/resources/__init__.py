@@ -6,4 +6,7 @@ from .retailer import RetailerRead, RetailerChange
 from .admin import Admin
 from .section import SectionRead, SectionChange
 from .product import ProductRead, ProductChange
-from .retail import Contract, Import
+from .retail import Contract, Contracts, Import
+from .export import Export
+from .cache import Cache
+from .token import Token
@@ -0,0 +1,38 @@
+from flask_restx import abort, reqparse
+
+# Keyset pagination: every page is `pid > cursor ORDER BY pid LIMIT n`, so it
+# costs an index range scan however deep it is. Pid of the last item goes to
+# X-Next-Cursor header, no header -> last page. Without limit and cursor the
+# whole list is returned, as before pagination.
+
+PAGE_SIZE = 100  # Of a request with cursor but no limit
+
+_ = page_args = reqparse.RequestParser()
+_.add_argument('limit', type=int, location='args', help='Page size, 1 - 1000 (whole list if no limit and cursor)')
+_.add_argument('cursor', type=str, location='args', help='X-Next-Cursor of the previous page')
+
+
+def paginate(query, column):
+    '''Return (page of query, 200, headers), ready for marshal_with.'''
+    args = page_args.parse_args()
+
+    if args['limit'] is None and args['cursor'] is None:
+        return query.order_by(column).all(), 200, {}
+
+    if (limit := args['limit']) is None:
+        limit = PAGE_SIZE
+
+    if not (0 < limit <= 1000):
+        abort(400, limit=f'Limit must be in range 0 < limit <= 1000, got {limit}.')
+
+    if (cursor := args['cursor']) is not None:
+        query = query.filter(column > cursor)
+
+    items = query.order_by(column).limit(limit + 1).all()
+
+    headers = {}
+    if len(items) > limit:
+        items = items[:limit]
+        headers['X-Next-Cursor'] = getattr(items[-1], column.key)
+
+    return items, 200, headers
@@ -3,7 +3,7 @@ from re import match
 from flask import g
 from flask_restx import Resource, abort, fields
 
-from app import api, auth, db
+from app import api, auth, credentials, db
 from app.models import RetailerModel
 from app.models.admin import AdminModel
 
@@ -112,6 +112,9 @@ class Admin(Resource):
         '''PATCH admin'''
         args = patch_admin.parse_args()
         admin = AdminModel.query.filter_by(pid=g.admin.pid).first()
+        if not admin:
+            abort(401, 'Admin does not exist any more.')
+        credentials.forget(admin.login)
 
         errors = {}
 
@@ -149,7 +152,10 @@ class Admin(Resource):
         '''DELETE admin'''
         pid = g.admin.pid
         admin = AdminModel.query.filter_by(pid=pid).first()
+        if not admin:
+            abort(401, 'Admin does not exist any more.')
 
+        credentials.forget(admin.login)
         db.session.delete(admin)
         db.session.commit()
 
@@ -0,0 +1,41 @@
+from flask_restx import Resource, fields
+
+from app import api, catalog
+
+
+# Namespace
+ns = api.namespace(
+    'Cache',
+    description='Statistics of the catalog cache (this worker only).',
+    path='/',
+)
+
+
+# Output
+cache_model = ns.model('CacheModel', {
+    'hits': fields.Integer(
+        description='Requests served from cache',
+        example=42,
+    ),
+    'misses': fields.Integer(
+        description='Requests served from DB',
+        example=7,
+    ),
+    'entries': fields.Integer(
+        description='Cached responses',
+        example=7,
+    ),
+    'size': fields.Integer(
+        description='Max cached responses',
+        example=1024,
+    ),
+})
+
+
+@ns.route('/cache')
+class Cache(Resource):
+    # - - - GET - - -
+    @ns.marshal_with(cache_model, False, 200, 'Cache statistics.')
+    def get(self):
+        '''GET catalog cache statistics'''
+        return catalog.stats()
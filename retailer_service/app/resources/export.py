@@ -0,0 +1,89 @@
+from json import dumps
+
+from flask import Response, g, stream_with_context
+from flask_restx import Resource, inputs
+from sqlalchemy import select, union_all
+
+from app import api, auth, db
+from app.models import ContractModel, TransactionArchiveModel, TransactionModel
+
+
+# Namespace
+ns = api.namespace(
+    'Export',
+    description='Export all contracts of admins retailer.',
+    path='/',
+)
+
+
+# Input
+_ = get_export = ns.parser()
+_.add_argument('since', type=inputs.datetime_from_iso8601, location='args', help='From (ISO 8601, including)')
+_.add_argument('until', type=inputs.datetime_from_iso8601, location='args', help='To (ISO 8601, excluding)')
+
+
+@ns.route('/export')
+class Export(Resource):
+    # Rows fetched from DB at once
+    _rows = 1000
+
+    # - - - GET - - -
+    @auth.login_required
+    @ns.expect(get_export)
+    @ns.response(401, 'Auth was not provided or wrong.')
+    @ns.response(200, 'NDJSON, one contract with its transactions per line.')
+    def get(self):
+        '''GET contracts and transactions of the retailer as NDJSON'''
+        args = get_export.parse_args()
+
+        filters = [ContractModel.retailer_pid == g.admin.retailer_pid]
+        if (since := args['since']) is not None:
+            filters.append(ContractModel.datetime >= since)
+        if (until := args['until']) is not None:
+            filters.append(ContractModel.datetime < until)
+
+        # Compacted contracts have their transactions in the archive
+        rows = union_all(*(
+            select(
+                ContractModel.aid, ContractModel.retailer_pid,
+                ContractModel.pay_method, ContractModel.datetime,
+                t.product_pid, t.amount, t.sold_at,
+            ).join(
+                t, t.contract_aid == ContractModel.aid,
+            ).where(
+                *filters,
+            )
+            for t in (TransactionModel, TransactionArchiveModel)
+        )).subquery()
+
+        query = select(rows).order_by(rows.c.datetime, rows.c.aid)
+
+        def generate():
+            # Server side cursor: rows come from DB in batches, and only one
+            # contract is held in memory at a time
+            result = db.session.execute(query.execution_options(stream_results=True))
+
+            contract = None
+            for row in result.yield_per(self._rows):
+                if contract is None or contract['aid'] != row.aid:
+                    if contract is not None:
+                        yield dumps(contract) + '\n'
+
+                    contract = {
+                        'aid': row.aid,
+                        'retailer_pid': row.retailer_pid,
+                        'pay_method': row.pay_method,
+                        'datetime': row.datetime.isoformat(),
+                        'transactions': [],
+                    }
+
+                contract['transactions'].append({
+                    'product_pid': row.product_pid,
+                    'amount': row.amount,
+                    'sold_at': row.sold_at,
+                })
+
+            if contract is not None:
+                yield dumps(contract) + '\n'
+
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
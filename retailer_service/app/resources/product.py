@@ -3,8 +3,9 @@ from re import match
 from flask import g
 from flask_restx import Resource, abort, fields
 
-from app import api, auth, db
+from app import api, auth, catalog, db
 from app.models import RetailerModel, SectionModel, ProductModel
+from ._page import page_args, paginate
 
 
 # Namespace
@@ -71,7 +72,11 @@ product_model = ns.model('ProductModel', {
 class ProductRead(Resource):
     # - - - GET - - -
     @auth.login_required(optional=True)
+    @ns.expect(page_args)
+    @ns.response(400, 'Invalid page.')
     @ns.response(404, 'Section not found.')
+    @ns.response(304, 'Not modified.')
+    @catalog.cached('section:{section_pid}')
     @ns.marshal_with(product_model, True, 200, 'List of products.')
     def get(self, section_pid):
         '''GET list of all products'''
@@ -82,13 +87,13 @@ class ProductRead(Resource):
 
         # If this is admin and belongs the same retailer
         if auth.current_user() and g.admin.retailer_pid == section.retailer_pid:
-            return section.products.all()
+            return paginate(section.products, ProductModel.pid)
 
         # If not admin or from other retailer
         if not section.is_active:
             abort(404, 'Section not found.')
 
-        return section.products.filter_by(is_active=True).all()
+        return paginate(section.products.filter_by(is_active=True), ProductModel.pid)
 
 
 @ns.route('/product/<product_pid>')
@@ -150,6 +155,7 @@ class ProductChange(Resource):
         )
 
         db.session.add(product)
+        catalog.invalidate(f'section:{section_pid}')
         db.session.commit()
 
         return product
@@ -203,6 +209,8 @@ class ProductChange(Resource):
         if (is_active := args['is_active']) is not None:
             product.is_active = is_active
 
+        # New pid cascades to transactions of contracts
+        catalog.invalidate(f'section:{product.section_pid}', *(['contracts'] if pid is not None else []))
         db.session.commit()
 
         return product
@@ -224,7 +232,10 @@ class ProductChange(Resource):
         if section.retailer_pid != g.admin.retailer_pid:
             abort(403, 'Admin-Retailer mistmatch.')
 
+        section_pid = product.section_pid
+
         db.session.delete(product)
+        catalog.invalidate(f'section:{section_pid}', 'contracts')
         db.session.commit()
 
         return {'message': f'deleted "product" (pid = {product_pid})'}
@@ -1,11 +1,18 @@
 from datetime import datetime
+from hashlib import sha256
+from random import uniform
 from re import match
+from time import sleep
 
-from flask import g
-from flask_restx import Resource, abort, fields
+from flask import current_app, g, request
+from flask_restx import Resource, abort, fields, marshal
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import contains_eager, joinedload
 
-from app import api, auth, db
-from app.models import RetailerModel, ContractModel, ProductModel, TransactionModel
+from app import api, auth, catalog, db
+from app.cache import immutable
+from app.models import RetailerModel, ContractModel, IdempotencyModel, ProductModel, StockModel, TransactionModel
 
 
 # Namespace
@@ -17,16 +24,25 @@ ns = api.namespace(
 
 
 # Input
+_ = get_contracts = ns.parser()
+_.add_argument('aid', type=str, action='append', location='args', required=True, help='Contract aid, repeat for many')
+
 _ = post_import = ns.parser()
 _.add_argument('retailer_pid', type=str, required=True, help='Retailers pid')
 _.add_argument('products', type=dict[str, int], required=True, help='Retailers pid')
 # products -> {product_pid: amount, ...}
+_.add_argument('Idempotency-Key', type=str, location='headers', help='Repeated request with the key gets the first result')
+
+_ = post_import_batch = ns.parser()
+_.add_argument('imports', type=list, location='json', required=True, help='List of imports')
+# imports -> [{retailer_pid: str, products: {product_pid: amount, ...}}, ...]
 
 _ = post_buy = ns.parser()
 _.add_argument('retailer_pid', type=str, required=True, help='Retailers pid')
 _.add_argument('products', type=dict[str, int], required=True, help='Retailers pid')
 # products -> {product_pid: amount, ...}
 _.add_argument('pay_method', type=str, required=True, help='Pay method')
+_.add_argument('Idempotency-Key', type=str, location='headers', help='Repeated request with the key gets the first result')
 
 
 # Output
@@ -56,14 +72,153 @@ contract_model = ns.model('ContractModel', {
         description='Date and time of contract.',
         example=str(datetime.utcnow()),
     ),
-    'transactions': fields.List(TransactionField),
+    'transactions': fields.List(TransactionField, attribute='ledger'),
 })
 
 
+def get_products(product_pids) -> dict[str, ProductModel]:
+    '''Load products with their sections and stock in one query.'''
+    query = ProductModel.query.join(
+        ProductModel.section,
+    ).options(
+        contains_eager(ProductModel.section),
+    ).filter(
+        ProductModel.pid.in_(product_pids),
+    )
+
+    return {product.pid: product for product in query}
+
+
+def check_import(retailer_pid, products, found) -> dict[str, str]:
+    '''Return {product_pid: error, ...} for products that can not be
+    imported. found -> result of get_products().'''
+    errors = {}
+
+    for product_pid, amount in products.items():
+        product = found.get(product_pid)
+        if not product:
+            errors[f'{product_pid}'] = 'Product not found.'
+            continue
+
+        if product.section.retailer_pid != retailer_pid:
+            errors[f'{product_pid}'] = 'Product belongs to another retailer.'
+            continue
+
+        # Import even inactive products
+        # if not product.section.is_active or not product.is_active:
+        #     errors[f'{product_pid}'] = 'Product is unavailable.'
+        #     continue
+
+        if not isinstance(amount, int) or not (0 < amount < 1000):
+            errors[f'{product_pid}'] = f'Amount must be in range 0 < amount < 1000, got {amount}.'
+            continue
+
+    return errors
+
+
+def chunks(items: list, size: int):
+    '''Split items into lists of size (the last one can be shorter).'''
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def stock_tags(found, product_pids) -> set[str]:
+    ''' Return cache tags of product lists showing stock of product_pids.
+        Call before write, rollbacks and commit expire found.'''
+    return {f'section:{found[pid].section_pid}' for pid in product_pids}
+
+
+def commit_atomic(write) -> bool:
+    ''' Run write() and commit it as one DB transaction. On lock conflicts
+        (deadlock, lock wait timeout, busy SQLite file) roll back and retry
+        write() with jittered backoff, WRITE_RETRIES times at most. Return
+        False if write() returned False, nothing is commited then.
+    '''
+    retries = current_app.config['WRITE_RETRIES']
+
+    for attempt in range(retries + 1):
+        try:
+            if not write():
+                db.session.rollback()
+                return False
+
+            db.session.commit()
+            return True
+
+        except OperationalError:
+            db.session.rollback()
+            sleep(uniform(0, 0.01 * 2 ** attempt))
+
+    abort(503, 'Database is busy, try again later.')
+
+
+class Idempotency:
+    ''' Idempotency-Key header of the request. If a request with the key was
+        commited, done is its IdempotencyModel (with contract) and the
+        handler replays it. The same key with another body is refused.
+    '''
+    def __init__(self):
+        self.key = request.headers.get('Idempotency-Key')
+        self.fingerprint = sha256(request.get_data()).hexdigest()
+        self.done = None
+        self._stale = None
+
+        if self.key is None:
+            return
+
+        if not (0 < len(self.key) <= 64):
+            abort(400, **{'Idempotency-Key': 'Must be 1 - 64 characters long.'})
+
+        self._find()
+
+    def commit(self, write, contract_aid) -> bool:
+        ''' commit_atomic() of write() and the key. If a request with the key
+            was commited meanwhile, nothing is commited and done is set.
+        '''
+        def keyed():
+            if not write():
+                return False
+
+            if self.key is not None:
+                if self._stale is not None:
+                    db.session.delete(self._stale)
+
+                db.session.add(IdempotencyModel(key=self.key, fingerprint=self.fingerprint, contract_aid=contract_aid))
+
+            return True
+
+        try:
+            return commit_atomic(keyed)
+
+        except IntegrityError:
+            db.session.rollback()
+
+            if self.key is None or not self._find():
+                raise
+
+            return True
+
+    def _find(self) -> bool:
+        if (row := IdempotencyModel.find(self.key)) is None:
+            return False
+
+        if row.expired:
+            self._stale = row
+            return False
+
+        if row.fingerprint != self.fingerprint:
+            abort(422, **{'Idempotency-Key': 'Was used with another request.'})
+
+        self.done = row
+        return True
+
+
 @ns.route('/contract/<contract_aid>')
 class Contract(Resource):
     # - - - GET - - -
     @ns.response(404, 'Contract not found.')
+    @ns.response(304, 'Not modified.')
+    @immutable('contract_aid', 'contracts')
     @ns.marshal_with(contract_model, False, 200, 'Contract and transactions.')
     def get(self, contract_aid):
         '''GET contract info and its transactions'''
@@ -71,24 +226,55 @@ class Contract(Resource):
         if not contract:
             abort(404, 'Contract not found.')
 
-        transactions = TransactionModel.query.filter_by(contract_aid=contract_aid).all()
-        if not transactions:
+        if not contract.ledger:
             abort(404, 'Transactions was not found.')
 
         return contract
 
 
+@ns.route('/contracts')
+class Contracts(Resource):
+    # Aids per request, keeps URL and IN (...) short
+    _max = 100
+
+    # - - - GET - - -
+    @ns.expect(get_contracts)
+    @ns.response(400, 'Invalid input data.')
+    @ns.marshal_with(contract_model, True, 200, 'Found contracts, unknown aids are skipped.')
+    def get(self):
+        '''GET many contracts and their transactions at once'''
+        aids = set(get_contracts.parse_args()['aid'])
+
+        if len(aids) > self._max:
+            abort(400, aid=f'Can not contain more then {self._max} items.')
+
+        # One query, both lists are joined (only one of them is not empty)
+        return ContractModel.query.options(
+            joinedload(ContractModel.transactions),
+            joinedload(ContractModel.archived_transactions),
+        ).filter(
+            ContractModel.aid.in_(aids),
+        ).order_by(
+            ContractModel.aid,
+        ).all()
+
+
 @ns.route('/import')
 class Import(Resource):
     # - - - POST - - -
     @ns.expect(post_import)
     @ns.response(400, 'Invalid input data.')
     @ns.response(404, 'Retailer/Product not found.')
+    @ns.response(422, 'Idempotency-Key was used with another request.')
     @ns.response(200, 'Import request successful.')
     def post(self):
         '''Import products TO retailer'''
         args = post_import.parse_args()
 
+        idempotency = Idempotency()
+        if idempotency.done:
+            return {'contract_aid': idempotency.done.contract_aid}
+
         retailer_pid = args['retailer_pid']
         if not RetailerModel.query.filter_by(pid=retailer_pid).first():
             abort(404, 'Retailer not found.')
@@ -100,47 +286,143 @@ class Import(Resource):
         if len(products) > 999:
             abort(400, 'Product list can not contain more then 999 items.')
 
+        found = get_products(products)
+        errors = check_import(retailer_pid, products, found)
+        if errors:
+            abort(400, **errors)
+
         contract = ContractModel(
             retailer_pid=retailer_pid,
             pay_method=None,
         )
+        transactions = [
+            TransactionModel(
+                contract_aid=contract.aid,
+                product_pid=product_pid,
+                sold_at=0,
+                amount=amount,
+            )
+            for product_pid, amount in products.items()
+        ]
+
+        def write():
+            db.session.add(contract)
+            db.session.add_all(transactions)
+            StockModel.add({t.product_pid: t.amount for t in transactions})
+            return True
+
+        tags = stock_tags(found, products)
+        idempotency.commit(write, contract.aid)
+        catalog.invalidate_commited(*tags)
+
+        if idempotency.done:
+            return {'contract_aid': idempotency.done.contract_aid}
+
+        return {'contract_aid': contract.aid}
+
+
+@ns.route('/import/batch')
+class ImportBatch(Resource):
+    # Rows per one multi-row INSERT, keeps statements under 999 parameters
+    # (SQLite < 3.32 limit)
+    _rows = 100
+
+    # - - - POST - - -
+    @ns.expect(post_import_batch)
+    @ns.response(400, 'Invalid input data.')
+    @ns.response(200, 'Result for each import (contract_aid or errors).')
+    def post(self):
+        '''Import products TO many retailers at once'''
+        args = post_import_batch.parse_args()
+
+        imports = args['imports']
+        if not imports:
+            abort(400, 'Import list can not be emty.')
+
+        if len(imports) > 999:
+            abort(400, 'Import list can not contain more then 999 items.')
+
+        if not all(
+            isinstance(n, dict) and
+            isinstance(n.get('retailer_pid'), str) and
+            isinstance(n.get('products'), dict)
+            for n in imports
+        ):
+            abort(400, 'Each import must be {retailer_pid: str, products: dict}.')
+
+        retailer_pids = {n['retailer_pid'] for n in imports}
+        product_pids = list({pid for n in imports for pid in n['products']})
+
+        retailers = {
+            pid for pid, in db.session.query(RetailerModel.pid).
+            filter(RetailerModel.pid.in_(retailer_pids))
+        }
+        found = {}
+        for pids in chunks(product_pids, self._rows):
+            found.update(get_products(pids))
+
+        now = datetime.utcnow()
+        results = []
+        contracts = []
         transactions = []
-        errors = {}
+        deltas = {}
 
-        for product_pid, amount in products.items():
-            product = ProductModel.query.filter_by(pid=product_pid).first()
-            if not product:
-                errors[f'{product_pid}'] = 'Product not found.'
+        for n in imports:
+            retailer_pid = n['retailer_pid']
+            products = n['products']
+
+            if retailer_pid not in retailers:
+                results.append({'retailer_pid': retailer_pid, 'errors': {'retailer_pid': 'Retailer not found.'}})
                 continue
 
-            if product.section.retailer_pid != retailer_pid:
-                errors[f'{product_pid}'] = 'Product belongs to another retailer.'
+            if not products:
+                results.append({'retailer_pid': retailer_pid, 'errors': {'products': 'Product list can not be emty.'}})
                 continue
 
-            # Import even inactive products
-            # if not product.section.is_active or not product.is_active:
-            #     errors[f'{product_pid}'] = 'Product is unavailable.'
+            if len(products) > 999:
+                results.append({'retailer_pid': retailer_pid, 'errors': {'products': 'Product list can not contain more then 999 items.'}})
                 continue
 
-            if not (0 < amount < 1000):
-                errors[f'{product_pid}'] = f'Amount must be in range 0 < amount < 1000, got {amount}.'
+            if errors := check_import(retailer_pid, products, found):
+                results.append({'retailer_pid': retailer_pid, 'errors': errors})
                 continue
 
-            transactions.append(TransactionModel(
-                contract_aid=contract.aid,
-                product_pid=product.pid,
-                sold_at=0,
-                amount=amount,
-            ))
+            contract_aid = ContractModel.generate_key()
+            contracts.append({
+                'aid': contract_aid,
+                'retailer_pid': retailer_pid,
+                'pay_method': None,
+                'datetime': now,
+            })
 
-        if errors:
-            abort(400, **errors)
+            for product_pid, amount in products.items():
+                transactions.append({
+                    'aid': TransactionModel.generate_key(),
+                    'contract_aid': contract_aid,
+                    'product_pid': product_pid,
+                    'sold_at': 0,
+                    'amount': amount,
+                })
+                deltas[product_pid] = deltas.get(product_pid, 0) + amount
 
-        db.session.add(contract)
-        db.session.add_all(transactions)
-        db.session.commit()
+            results.append({'retailer_pid': retailer_pid, 'contract_aid': contract_aid})
 
-        return {'contract_aid': contract.aid}
+        def write():
+            for rows in chunks(contracts, self._rows):
+                db.session.execute(insert(ContractModel).values(rows))
+
+            for rows in chunks(transactions, self._rows):
+                db.session.execute(insert(TransactionModel).values(rows))
+
+            StockModel.add(deltas)
+            return True
+
+        if contracts:
+            tags = stock_tags(found, deltas)
+            commit_atomic(write)
+            catalog.invalidate_commited(*tags)
+
+        return {'results': results}
 
 
 @ns.route('/buy')
@@ -149,11 +431,17 @@ class Buy(Resource):
     @ns.expect(post_buy)
     @ns.response(400, 'Invalid input data.')
     @ns.response(404, 'Retailer/Section/Product not found.')
+    @ns.response(422, 'Idempotency-Key was used with another request.')
     @ns.response(200, 'Buy request successful.')
     def post(self):
         '''Buy products FROM retailer'''
         args = post_buy.parse_args()
 
+        idempotency = Idempotency()
+        if idempotency.done:
+            contract = idempotency.done.contract
+            return {'contract_aid': contract.aid, 'contract': marshal(contract, contract_model)}
+
         retailer_pid = args['retailer_pid']
         if not RetailerModel.query.filter_by(pid=retailer_pid).first():
             abort(404, 'Retailer not found.')
@@ -177,8 +465,10 @@ class Buy(Resource):
         transactions = []
         errors = {}
 
+        found = get_products(products)
+
         for product_pid, amount in products.items():
-            product = ProductModel.query.filter_by(pid=product_pid).first()
+            product = found.get(product_pid)
             if not product:
                 errors[f'{product_pid}'] = 'Product not found.'
                 continue
@@ -209,8 +499,35 @@ class Buy(Resource):
         if errors:
             abort(400, **errors)
 
-        db.session.add(contract)
-        db.session.add_all(transactions)
-        db.session.commit()
+        # Check above is only a fast path, two buyers can both pass it. The
+        # conditional decrement is what actually guards the stock.
+        demand = {t.product_pid: -t.amount for t in transactions}
 
-        return {'contract_aid': contract.aid}
+        def write():
+            if not StockModel.reserve(demand):
+                return False
+
+            db.session.add(contract)
+            db.session.add_all(transactions)
+            return True
+
+        tags = stock_tags(found, demand)
+        if not idempotency.commit(write, contract.aid):
+            in_stock = dict(
+                db.session.query(StockModel.product_pid, StockModel.amount).
+                filter(StockModel.product_pid.in_(demand))
+            )
+
+            for product_pid, amount in demand.items():
+                if amount > (left := in_stock.get(product_pid, 0)):
+                    errors[f'{product_pid}'] = f'Demand is too high (got {left}, asked for {amount}).'
+
+            abort(400, 'Demand is too high.', **errors)
+
+        catalog.invalidate_commited(*tags)
+
+        if idempotency.done:
+            contract = idempotency.done.contract
+
+        # Contract is immutable, callers may keep it as a receipt
+        return {'contract_aid': contract.aid, 'contract': marshal(contract, contract_model)}
@@ -3,8 +3,9 @@ from re import match
 from flask import g
 from flask_restx import Resource, abort, fields
 
-from app import api, auth, db
-from app.models import RetailerModel
+from app import api, auth, catalog, db
+from app.models import RetailerModel, SectionModel
+from ._page import page_args, paginate
 
 
 # Namespace
@@ -55,10 +56,14 @@ retailer_model = ns.model('RetailerModel', {
 @ns.route('/retailers')
 class RetailerRead(Resource):
     # - - - GET - - -
+    @ns.expect(page_args)
+    @ns.response(400, 'Invalid page.')
+    @ns.response(304, 'Not modified.')
+    @catalog.cached('retailers')
     @ns.marshal_with(retailer_model, True, 200, 'List of retailers.')
     def get(self):
         '''GET list of all retailers'''
-        return RetailerModel.query.all()
+        return paginate(RetailerModel.query, RetailerModel.pid)
 
 
 @ns.route('/retailer')
@@ -103,6 +108,7 @@ class RetailerChange(Resource):
         )
 
         db.session.add(retailer)
+        catalog.invalidate('retailers')
         db.session.commit()
 
         return retailer
@@ -117,6 +123,8 @@ class RetailerChange(Resource):
         '''PATCH retailer'''
         args = patch_retailer.parse_args()
         retailer = RetailerModel.query.filter_by(pid=g.admin.retailer_pid).first()
+        if not retailer:
+            abort(401, 'Retailer does not exist any more.')
 
         errors = {}
 
@@ -147,6 +155,8 @@ class RetailerChange(Resource):
         if errors:
             abort(400, **errors)
 
+        # New pid cascades to contracts
+        catalog.invalidate('retailers', f'retailer:{g.admin.retailer_pid}', f'retailer:{retailer.pid}', *(['contracts'] if pid is not None else []))
         db.session.commit()
 
         return retailer
@@ -159,8 +169,12 @@ class RetailerChange(Resource):
         '''DELETE retailer'''
         pid = g.admin.retailer_pid
         retailer = RetailerModel.query.filter_by(pid=pid).first()
+        if not retailer:
+            abort(401, 'Retailer does not exist any more.')
+        sections = [s for s, in db.session.query(SectionModel.pid).filter_by(retailer_pid=pid)]
 
         db.session.delete(retailer)
+        catalog.invalidate('retailers', f'retailer:{pid}', 'contracts', *(f'section:{s}' for s in sections))
         db.session.commit()
 
         return {'message': f'deleted "retailer" (pid = {pid})'}
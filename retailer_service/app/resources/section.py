@@ -3,8 +3,9 @@ from re import match
 from flask import g
 from flask_restx import Resource, abort, fields
 
-from app import api, auth, db
+from app import api, auth, catalog, db
 from app.models import RetailerModel, SectionModel
+from ._page import page_args, paginate
 
 
 # Namespace
@@ -59,7 +60,11 @@ section_model = ns.model('SectionModel', {
 class SectionRead(Resource):
     # - - - GET - - -
     @auth.login_required(optional=True)
+    @ns.expect(page_args)
+    @ns.response(400, 'Invalid page.')
     @ns.response(404, 'Retailer not found.')
+    @ns.response(304, 'Not modified.')
+    @catalog.cached('retailer:{retailer_pid}')
     @ns.marshal_with(section_model, True, 200, 'List of sections.')
     def get(self, retailer_pid):
         '''GET list of all sections'''
@@ -69,10 +74,10 @@ class SectionRead(Resource):
 
         # If this is admin and belongs the same retailer
         if auth.current_user() and g.admin.retailer_pid == retailer_pid:
-            return SectionModel.query.filter_by(retailer_pid=retailer_pid).all()
+            return paginate(SectionModel.query.filter_by(retailer_pid=retailer_pid), SectionModel.pid)
 
         # If not admin or from other retailer
-        return SectionModel.query.filter_by(retailer_pid=retailer_pid, is_active=True).all()
+        return paginate(SectionModel.query.filter_by(retailer_pid=retailer_pid, is_active=True), SectionModel.pid)
 
 
 @ns.route('/section/<section_pid>')
@@ -123,6 +128,7 @@ class SectionChange(Resource):
         )
 
         db.session.add(section)
+        catalog.invalidate(f'retailer:{retailer_pid}')
         db.session.commit()
 
         return section
@@ -169,6 +175,7 @@ class SectionChange(Resource):
         if (is_active := args['is_active']) is not None:
             section.is_active = is_active
 
+        catalog.invalidate(f'retailer:{section.retailer_pid}', f'section:{section_pid}', f'section:{section.pid}')
         db.session.commit()
 
         return section
@@ -189,7 +196,10 @@ class SectionChange(Resource):
         if section.retailer_pid != g.admin.retailer_pid:
             abort(403, 'Admin-Retailer mistmatch.')
 
+        retailer_pid = section.retailer_pid
+
         db.session.delete(section)
+        catalog.invalidate(f'retailer:{retailer_pid}', f'section:{section_pid}', 'contracts')
         db.session.commit()
 
         return {'message': f'deleted "section" (pid = {section_pid})'}
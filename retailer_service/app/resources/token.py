@@ -0,0 +1,40 @@
+from flask import current_app, g
+from flask_restx import Resource, fields
+
+from app import api, basic_auth, tokens
+
+
+# Namespace
+ns = api.namespace(
+    'Token',
+    description='Exchange admin login and password for a bearer token, send '
+                'it as "Authorization: Bearer <token>" instead of them.',
+    path='/',
+)
+
+
+# Output
+token_model = ns.model('TokenModel', {
+    'token': fields.String(
+        description='Bearer token',
+        example='eyJwaWQiOiJhZG1pbl8xIn0.ZaBcDe.3k...',
+    ),
+    'expires_in': fields.Integer(
+        description='Seconds the token is valid',
+        example=900,
+    ),
+})
+
+
+@ns.route('/token')
+class Token(Resource):
+    # - - - POST - - -
+    @basic_auth.login_required
+    @ns.response(401, 'Auth was not provided or wrong.')
+    @ns.marshal_with(token_model, False, 200, 'New token.')
+    def post(self):
+        '''POST login and password (HTTP Basic) for a token'''
+        return {
+            'token': tokens.issue(g.admin.claims),
+            'expires_in': current_app.config['AUTH_TOKEN_TTL'],
+        }
@@ -0,0 +1,32 @@
+''' Row format of list responses for other services.
+
+    Asked for with `Accept: application/vnd.shop.rows+json`. A list of
+    objects is sent as an array of arrays, the first one is the column names:
+
+        [["pid", "name"], ["summer_sail", "Summer Sail"], ...]
+
+    So keys are not repeated in every object and there is no whitespace, the
+    body is smaller and quicker to encode and parse. Anything else (errors)
+    is sent as compact JSON. Public clients keep getting application/json.
+'''
+from json import dumps
+from operator import itemgetter
+
+from flask import make_response
+
+ROWS = 'application/vnd.shop.rows+json'
+
+
+def output_rows(data, code, headers=None):
+    if isinstance(data, list) and data and isinstance(data[0], dict):
+        columns = list(data[0])
+
+        if len(columns) == 1:
+            data = [columns, *([item[columns[0]]] for item in data)]
+        else:
+            data = [columns, *map(itemgetter(*columns), data)]
+
+    response = make_response(dumps(data, separators=(',', ':')), code)
+    response.headers.extend(headers or {})
+    response.vary.add('Accept')
+    return response
@@ -4,3 +4,16 @@ SECRET_KEY = environ.get('SECRET_KEY')
 SQLALCHEMY_DATABASE_URI = environ.get('SQLALCHEMY_DATABASE_URI')
 SQLALCHEMY_TRACK_MODIFICATIONS = False
 RESTX_ERROR_404_HELP = False
+WRITE_RETRIES = int(environ.get('WRITE_RETRIES', 5))  # On deadlocks/lock timeouts
+CATALOG_CACHE_SIZE = int(environ.get('CATALOG_CACHE_SIZE', 1024))  # Responses
+IDEMPOTENCY_TTL = int(environ.get('IDEMPOTENCY_TTL', 24 * 60 * 60))  # Seconds a key is remembered
+COMPRESS_MIN_SIZE = int(environ.get('COMPRESS_MIN_SIZE', 1024))  # Bytes, smaller bodies are sent as is
+COMPRESS_LEVEL = int(environ.get('COMPRESS_LEVEL', 6))  # gzip 1 - 9
+COMPRESS_MAX_REQUEST = int(environ.get('COMPRESS_MAX_REQUEST', 16 * 2 ** 20))  # Bytes of decompressed request body
+
+AUTH_CACHE_TTL = float(environ.get('AUTH_CACHE_TTL', 300))  # Seconds a checked password is trusted
+AUTH_CACHE_SIZE = int(environ.get('AUTH_CACHE_SIZE', 1024))  # Credentials per worker
+AUTH_TOKEN_TTL = int(environ.get('AUTH_TOKEN_TTL', 900))  # Seconds a bearer token is valid
+AUTH_TOKEN_AUDIENCE = 'retailer-admin'  # Tokens of other services are not accepted
+
+PASSWORD_HASH_METHOD = environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:260000')  # werkzeug method:cost, pick it with retailer_service/bench_hash.py
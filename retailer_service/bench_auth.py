@@ -0,0 +1,72 @@
+''' Benchmark of authenticated requests (GET /admin): HTTP Basic with every
+    password checked with its hash (credential cache off), with verified
+    credential cache and with a bearer token. Reports requests per second
+    and the cost of a token check alone.
+
+    python bench_auth.py [requests]
+'''
+from os import environ, path
+from sys import argv
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from timeit import timeit
+
+
+def main():
+    requests = int(argv[1]) if len(argv) > 1 else 200
+
+    with TemporaryDirectory() as tmp:
+        environ['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{path.join(tmp, 'bench.sqlite3')}"
+        environ.setdefault('SECRET_KEY', 'bench')
+
+        from app import create_app, credentials, db, tokens
+
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+
+        client = app.test_client()
+        client.post('/retailer', json={
+            'pid': 'bench_shop',
+            'name': 'Bench Shop',
+            'address': 'str. Bench, 1',
+            'phone': '123-123-99',
+        })
+        client.post('/admin', json={
+            'pid': 'bench_admin',
+            'retailer_pid': 'bench_shop',
+            'login': 'bench_admin',
+            'password': 'aA#45678',
+        })
+
+        print(f'{requests} x GET /admin')
+
+        for name, ttl in (('no cache', 0), ('cache', 300)):
+            credentials.ttl = ttl
+            credentials.clear()
+
+            start = perf_counter()
+            for _ in range(requests):
+                assert client.get('/admin', auth=('bench_admin', 'aA#45678')).status_code == 200
+            elapsed = perf_counter() - start
+
+            print(f'{name:>8}: {requests / elapsed:8.1f} requests/s, {elapsed / requests * 1000:6.2f} ms/request')
+
+        token = client.post('/token', auth=('bench_admin', 'aA#45678')).json['token']
+        bearer = {'Authorization': f'Bearer {token}'}
+
+        start = perf_counter()
+        for _ in range(requests):
+            assert client.get('/admin', headers=bearer).status_code == 200
+        elapsed = perf_counter() - start
+
+        print(f"{'token':>8}: {requests / elapsed:8.1f} requests/s, {elapsed / requests * 1000:6.2f} ms/request")
+
+        with app.app_context():
+            check = timeit(lambda: tokens.verify(token), number=10_000) / 10_000
+
+        print(f'token check: {check * 10 ** 6:.1f} us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+''' Stress benchmark of /buy under several processes (like gunicorn workers)
+    buying the same products at once. Reports throughput and checks that
+    nothing was oversold: stock never goes below zero and every successful
+    buy has its transaction.
+
+    python bench_buy.py [processes] [requests per process] [stock]
+
+    Uses a temporary SQLite file, set BENCH_DATABASE_URI to run against
+    MySQL (the database must be empty).
+'''
+from multiprocessing import get_context
+from os import environ, path
+from sys import argv
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+PRODUCTS = ('bench_a', 'bench_b')
+
+
+def setup(stock):
+    from app import create_app, db
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+
+        client = app.test_client()
+        client.post('/retailer', json={
+            'pid': 'bench_shop',
+            'name': 'Bench Shop',
+            'address': 'str. Bench, 1',
+            'phone': '123-123-99',
+        })
+        client.post('/admin', json={
+            'pid': 'bench_admin',
+            'retailer_pid': 'bench_shop',
+            'login': 'bench_admin',
+            'password': 'aA#45678',
+        })
+        client.post('/section/bench_section', auth=('bench_admin', 'aA#45678'), json={
+            'name': 'Bench',
+            'about': 'Bench section',
+            'is_active': True,
+        })
+        for pid in PRODUCTS:
+            client.post(f'/product/{pid}', auth=('bench_admin', 'aA#45678'), json={
+                'section_pid': 'bench_section',
+                'name': pid,
+                'about': pid,
+                'price': 1,
+                'is_active': True,
+            })
+
+        for left in range(stock, 0, -999):
+            client.post('/import', json={
+                'retailer_pid': 'bench_shop',
+                'products': {pid: min(left, 999) for pid in PRODUCTS},
+            })
+
+        db.engine.dispose()
+
+
+def worker(n):
+    from app import create_app
+
+    app = create_app()
+    client = app.test_client()
+    ok = 0
+
+    with app.app_context():
+        for _ in range(n):
+            r = client.post('/buy', json={
+                'retailer_pid': 'bench_shop',
+                'products': {pid: 1 for pid in PRODUCTS},
+                'pay_method': 'cash',
+            })
+            ok += r.status_code == 200
+
+    return ok
+
+
+def check():
+    from app import create_app, db
+    from app.models import StockModel, TransactionModel
+
+    app = create_app()
+    with app.app_context():
+        stock = dict(db.session.query(StockModel.product_pid, StockModel.amount))
+        ledger = {
+            pid: sum(t.amount for t in TransactionModel.query.filter_by(product_pid=pid))
+            for pid in PRODUCTS
+        }
+
+    return stock, ledger
+
+
+def main():
+    processes = int(argv[1]) if len(argv) > 1 else 4
+    requests = int(argv[2]) if len(argv) > 2 else 200
+    stock = int(argv[3]) if len(argv) > 3 else processes * requests // 2
+
+    with TemporaryDirectory() as tmp:
+        environ['SQLALCHEMY_DATABASE_URI'] = environ.get(
+            'BENCH_DATABASE_URI',
+            f"sqlite:///{path.join(tmp, 'bench.sqlite3')}",
+        )
+        environ.setdefault('SECRET_KEY', 'bench')
+
+        # Spawn, so workers do not share the parent connection pool
+        ctx = get_context('spawn')
+
+        with ctx.Pool(1) as pool:
+            pool.apply(setup, (stock, ))
+
+        start = perf_counter()
+        with ctx.Pool(processes) as pool:
+            bought = sum(pool.map(worker, [requests] * processes))
+        elapsed = perf_counter() - start
+
+        with ctx.Pool(1) as pool:
+            balances, ledger = pool.apply(check)
+
+    print(f'{processes} processes x {requests} requests, stock {stock}')
+    print(f'{processes * requests / elapsed:.1f} req/s, {bought} successful buys')
+
+    oversold = 0
+    for pid in PRODUCTS:
+        sold = stock - balances[pid]
+        oversold += max(0, -balances[pid]) + abs(ledger[pid] - balances[pid]) + abs(sold - bought)
+        print(f'{pid}: left {balances[pid]}, ledger {ledger[pid]}, sold {sold}')
+
+    print(f'oversells: {oversold}')
+    if oversold:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
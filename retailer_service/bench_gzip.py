@@ -0,0 +1,120 @@
+''' Benchmark of gzip on a 10k product listing: bytes on the wire and end to
+    end latency of reading all pages, plain vs gzip. Loopback has no
+    bandwidth limit, so the time the bytes would take on a link of given
+    speed is added as well.
+
+    python bench_gzip.py [products] [Mbit/s]
+'''
+from gzip import decompress
+from logging import ERROR, getLogger
+from os import environ, path
+from sys import argv
+from tempfile import TemporaryDirectory
+from threading import Thread
+from time import perf_counter
+
+from requests import Session
+from werkzeug.serving import make_server
+
+
+def setup(products):
+    from sqlalchemy import insert
+
+    from app import create_app, db
+    from app.models import ProductModel, StockModel
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+
+        client = app.test_client()
+        client.post('/retailer', json={
+            'pid': 'bench_shop',
+            'name': 'Bench Shop',
+            'address': 'str. Bench, 1',
+            'phone': '123-123-99',
+        })
+        client.post('/admin', json={
+            'pid': 'bench_admin',
+            'retailer_pid': 'bench_shop',
+            'login': 'bench_admin',
+            'password': 'aA#45678',
+        })
+        client.post('/section/bench_section', auth=('bench_admin', 'aA#45678'), json={
+            'name': 'Bench',
+            'about': 'Bench section',
+            'is_active': True,
+        })
+
+        pids = [f'bench_product_{n:05}' for n in range(products)]
+        db.session.execute(insert(ProductModel), [
+            {
+                'pid': pid,
+                'section_pid': 'bench_section',
+                'name': f'Product {n}',
+                'about': f'Some info about product number {n}',
+                'price': n % 1000 + 1,
+                'is_active': True,
+            }
+            for n, pid in enumerate(pids)
+        ])
+        db.session.execute(insert(StockModel), [{'product_pid': pid, 'amount': 10} for pid in pids])
+        db.session.commit()
+
+    return app
+
+
+def read_all(s, url, encoding):
+    ''' Read all pages, return (bytes on the wire, products).'''
+    wire, products, params = 0, 0, {'limit': 1000}
+
+    while True:
+        response = s.get(url, params=params, headers={'Accept-Encoding': encoding}, stream=True)
+        body = response.raw.read(decode_content=False)
+        wire += len(body)
+
+        if response.headers.get('Content-Encoding') == 'gzip':
+            body = decompress(body)
+        products += body.count(b'"pid"')
+
+        if (cursor := response.headers.get('X-Next-Cursor')) is None:
+            return wire, products
+        params['cursor'] = cursor
+
+
+def main():
+    products = int(argv[1]) if len(argv) > 1 else 10_000
+    mbits = float(argv[2]) if len(argv) > 2 else 100
+
+    with TemporaryDirectory() as tmp:
+        environ['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{path.join(tmp, 'bench.sqlite3')}"
+        environ.setdefault('SECRET_KEY', 'bench')
+
+        app = setup(products)
+        getLogger('werkzeug').setLevel(ERROR)
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        Thread(target=server.serve_forever, daemon=True).start()
+
+        url = f'http://127.0.0.1:{server.port}/products/bench_section'
+
+        with Session() as s:
+            print(f'{products} products, link {mbits:g} Mbit/s')
+
+            for encoding in ('identity', 'gzip'):
+                read_all(s, url, encoding)  # Warm up (and fill catalog cache)
+
+                runs = 5
+                start = perf_counter()
+                for _ in range(runs):
+                    wire, got = read_all(s, url, encoding)
+                elapsed = (perf_counter() - start) / runs
+
+                link = wire * 8 / (mbits * 10 ** 6)
+                print(f'{encoding:>8}: {wire / 2 ** 10:8.1f} KiB, {elapsed * 1000:7.1f} ms loopback, '
+                      f'{(elapsed + link) * 1000:7.1f} ms on the link ({got} products)')
+
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
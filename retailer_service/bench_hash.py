@@ -0,0 +1,54 @@
+''' Benchmark of password hashing methods for PASSWORD_HASH_METHOD. Reports
+    hashes per second of one core and of all of them (a worker per core),
+    and for PBKDF2 the iterations that fit the login budget on one core.
+
+    python bench_hash.py [budget ms] [method ...]
+'''
+from multiprocessing import Pool, cpu_count
+from sys import argv
+from time import perf_counter
+
+from werkzeug.security import generate_password_hash
+
+METHODS = (
+    'pbkdf2:sha256:50000',
+    'pbkdf2:sha256:100000',
+    'pbkdf2:sha256:260000',
+    'pbkdf2:sha512:260000',
+)
+
+
+def rate(method: str, seconds: float = 1.0) -> float:
+    '''Hashes per second of method on this core.'''
+    hashes, start = 0, perf_counter()
+
+    while (elapsed := perf_counter() - start) < seconds:
+        generate_password_hash('aA#45678', method)
+        hashes += 1
+
+    return hashes / elapsed
+
+
+def main():
+    budget = float(argv[1]) if len(argv) > 1 else 100
+    methods = argv[2:] or METHODS
+    cores = cpu_count()
+
+    print(f'{cores} cores, login budget {budget:g} ms')
+
+    with Pool(cores) as pool:
+        for method in methods:
+            one = rate(method)
+            total = sum(pool.map(rate, [method] * cores))
+
+            line = f'{method:>24}: {one:8.1f} hashes/s per core ({1000 / one:7.2f} ms), {total:8.1f} hashes/s total'
+
+            if method.startswith('pbkdf2:') and method.count(':') == 2:
+                iterations = int(method.rsplit(':', 1)[1])
+                line += f', fits budget: {int(iterations * budget * one / 1000)} iterations'
+
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,10 @@
 ''' Tests depends on each other, so can only be deployed all at once.
 '''
+from contextlib import contextmanager
+from datetime import datetime
+
 import pytest
+from sqlalchemy import event
 
 from app import create_app, models, db as _db
 
@@ -10,6 +14,7 @@ def app(request):
     app = create_app()
     app.testing = True
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SECRET_KEY'] = 'test'
     return app
 
 
@@ -46,6 +51,19 @@ def session(request, app, db):
     # session.remove()
 
 
+@contextmanager
+def count_queries():
+    '''Count SQL statements sent to DB inside the block.'''
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(_db.engine, 'before_cursor_execute', before_cursor_execute)
+    yield statements
+    event.remove(_db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
 class Test_0:
     '''Just to make shure that pytest works.'''
     def test_0(self, client, session):
@@ -220,3 +238,570 @@ class Test_3_Sections:
             'is_active': is_active,
         }
         assert d == data
+
+
+class Test_4_Products:
+    @pytest.mark.parametrize('login, password, pid, section_pid, name, about, price', (
+        ('admin_1', 'aA#45678', 'product_1_1', 'section_1_1', 'Product 1', 'About 1', 10),
+        ('admin_1', 'aA#45678', 'product_1_2', 'section_1_1', 'Product 2', 'About 2', 20),
+        ('admin_2', 'aA#45678', 'product_2_1', 'section_2_1', 'Product 1', 'About 1', 30),
+    ))
+    def test_4_1_post_positive(self, client, session, login, password, pid, section_pid, name, about, price):
+        data = {
+            'section_pid': section_pid,
+            'name': name,
+            'about': about,
+            'price': price,
+            'is_active': True,
+        }
+
+        r = client.post(f'/product/{pid}', json=data, auth=(login, password))
+        assert r.status_code == 200
+
+        d = r.json
+        data['pid'] = pid
+        data['in_stock'] = 0
+        assert d == data
+
+
+class Test_5_Retail:
+    def test_5_1_import(self, client, session):
+        data = {
+            'retailer_pid': 'shop_1',
+            'products': {'product_1_1': 50, 'product_1_2': 20},
+        }
+
+        r = client.post('/import', json=data)
+        assert r.status_code == 200
+        assert r.json['contract_aid']
+
+        r = client.get('/products/section_1_1')
+        assert r.status_code == 200
+        assert {p['pid']: p['in_stock'] for p in r.json} == {'product_1_1': 50, 'product_1_2': 20}
+
+    @pytest.mark.parametrize('products, status, in_stock', (
+        ({'product_1_1': 5}, 200, 45),
+        ({'product_1_1': 46}, 400, 45),
+        ({'product_1_1': 45}, 200, 0),
+    ))
+    def test_5_2_buy(self, client, session, products, status, in_stock):
+        data = {
+            'retailer_pid': 'shop_1',
+            'products': products,
+            'pay_method': 'cash',
+        }
+
+        r = client.post('/buy', json=data)
+        assert r.status_code == status
+        if status == 200:
+            assert r.json['contract']['aid'] == r.json['contract_aid']
+            assert r.json['contract']['transactions'] == [{'product_pid': 'product_1_1', 'amount': -products['product_1_1'], 'sold_at': 10}]
+        assert models.ProductModel.query.filter_by(pid='product_1_1').first().in_stock == in_stock
+
+    def test_5_3_rebuild_stock(self, app, client, session):
+        session.query(models.StockModel).update({'amount': 999})
+        session.commit()
+
+        r = app.test_cli_runner().invoke(args=['stock', 'rebuild'])
+        assert r.exit_code == 0
+
+        stock = dict(session.query(models.StockModel.product_pid, models.StockModel.amount))
+        assert stock == {'product_1_1': 0, 'product_1_2': 20, 'product_2_1': 0}
+
+    def test_5_4_query_count(self, client, session):
+        pids = [f'product_bulk_{n}' for n in range(20)]
+        session.add_all(
+            models.ProductModel(pid=pid, section_pid='section_1_1', name=pid, about=pid, price=1, is_active=True)
+            for pid in pids
+        )
+        session.commit()
+
+        counts = {}
+        for size in (1, 20):
+            with count_queries() as imports:
+                r = client.post('/import', json={
+                    'retailer_pid': 'shop_1',
+                    'products': {pid: 10 for pid in pids[:size]},
+                })
+                assert r.status_code == 200
+
+            with count_queries() as buys:
+                r = client.post('/buy', json={
+                    'retailer_pid': 'shop_1',
+                    'products': {pid: 1 for pid in pids[:size]},
+                    'pay_method': 'cash',
+                })
+                assert r.status_code == 200
+
+            counts[size] = (len(imports), len(buys))
+
+        assert counts[1] == counts[20]
+
+    def test_5_5_reserve(self, client, session):
+        # Both are in stock, but not both of them at once
+        nested = session.begin_nested()
+        assert not models.StockModel.reserve({'product_1_2': 15, 'product_bulk_0': 99})
+        nested.rollback()
+
+        assert models.StockModel.reserve({'product_1_2': 15, 'product_bulk_0': 1})
+        session.commit()
+
+        stock = dict(session.query(models.StockModel.product_pid, models.StockModel.amount))
+        assert stock['product_1_2'] == 5
+        assert stock['product_bulk_0'] == 17
+
+    def test_5_6_import_batch(self, client, session):
+        data = {'imports': [
+            {'retailer_pid': 'shop_1', 'products': {'product_1_1': 10, 'product_1_2': 5}},
+            {'retailer_pid': 'shop_2', 'products': {'product_2_1': 7}},
+            {'retailer_pid': 'shop_2', 'products': {'product_1_1': 7}},
+            {'retailer_pid': 'no_shop', 'products': {'product_1_1': 7}},
+        ]}
+
+        r = client.post('/import/batch', json=data)
+        assert r.status_code == 200
+
+        results = r.json['results']
+        assert [bool(n.get('contract_aid')) for n in results] == [True, True, False, False]
+        assert results[2]['errors'] == {'product_1_1': 'Product belongs to another retailer.'}
+
+        contract = models.ContractModel.query.filter_by(aid=results[0]['contract_aid']).first()
+        assert {t.product_pid: t.amount for t in contract.transactions} == {'product_1_1': 10, 'product_1_2': 5}
+
+        stock = dict(session.query(models.StockModel.product_pid, models.StockModel.amount))
+        assert stock['product_1_1'] == 10
+        assert stock['product_1_2'] == 10
+        assert stock['product_2_1'] == 7
+
+    @staticmethod
+    def ledger() -> dict:
+        '''{product_pid: amount} of the ledger (checkpoint + transactions), zeros left out.'''
+        from sqlalchemy import select
+        from app.commands import ledger_totals
+
+        return {pid: amount for pid, amount in _db.session.execute(select(ledger_totals())) if amount}
+
+    def test_5_7_checkpoint(self, client, session):
+        from datetime import datetime, timedelta
+        from app.commands import make_checkpoint
+
+        before = self.ledger()
+
+        at = datetime.utcnow()
+        assert make_checkpoint(at) == models.ProductModel.query.count()
+        assert self.ledger() == before
+
+        with pytest.raises(ValueError):
+            make_checkpoint(at - timedelta(minutes=1))
+
+        # Later contracts are added on top of the checkpoint
+        r = client.post('/import', json={'retailer_pid': 'shop_1', 'products': {'product_1_1': 2}})
+        assert r.status_code == 200
+        assert self.ledger() == {**before, 'product_1_1': before['product_1_1'] + 2}
+
+    def test_5_8_compact(self, client, session):
+        from datetime import datetime
+        from app.commands import compact_ledger, make_checkpoint, rebuild_stock
+
+        contracts = [c.aid for c in models.ContractModel.query.all()]
+        before = {aid: client.get(f'/contract/{aid}').json for aid in contracts}
+        ledger = self.ledger()
+
+        assert make_checkpoint(datetime.utcnow())
+        assert compact_ledger() > 0
+        assert models.TransactionModel.query.count() == 0
+        assert models.CheckpointModel.query.with_entities(models.CheckpointModel.datetime).distinct().count() == 1
+
+        # Archived contracts read the same, totals are kept by the checkpoint
+        assert {aid: client.get(f'/contract/{aid}').json for aid in contracts} == before
+        assert self.ledger() == ledger
+
+        r = client.post('/buy', json={
+            'retailer_pid': 'shop_1',
+            'products': {'product_1_1': 3},
+            'pay_method': 'cash',
+        })
+        assert r.status_code == 200
+
+        rebuild_stock()
+        assert models.ProductModel.query.filter_by(pid='product_1_1').first().in_stock == ledger['product_1_1'] - 3
+
+
+class Test_6_Pages:
+    def test_6_1_products(self, client, session):
+        expected = sorted(p.pid for p in models.ProductModel.query.filter_by(section_pid='section_1_1'))
+
+        pids = []
+        params = {'limit': 5}
+        while True:
+            r = client.get('/products/section_1_1', query_string=params)
+            assert r.status_code == 200
+            assert len(r.json) <= 5
+
+            pids += [p['pid'] for p in r.json]
+            if 'X-Next-Cursor' not in r.headers:
+                break
+            params['cursor'] = r.headers['X-Next-Cursor']
+
+        assert pids == expected
+
+    @pytest.mark.parametrize('url', ('/retailers', '/sections/shop_1', '/products/section_1_1'))
+    def test_6_2_invalid_limit(self, client, session, url):
+        r = client.get(url, query_string={'limit': 0})
+        assert r.status_code == 400
+
+    def test_6_3_whole_list(self, client, session):
+        session.add(models.SectionModel(pid='section_big', retailer_pid='shop_1', name='Big', about='Big', is_active=True))
+        session.add_all(
+            models.ProductModel(pid=f'big_{n:03}', section_pid='section_big', name=f'Big {n}', about=f'Big {n}', price=1, is_active=True)
+            for n in range(150)
+        )
+        session.commit()
+
+        # No limit and no cursor: not paginated
+        r = client.get('/products/section_big')
+        assert len(r.json) == 150
+        assert 'X-Next-Cursor' not in r.headers
+
+        r = client.get('/products/section_big', query_string={'cursor': 'big_009'})
+        assert [p['pid'] for p in r.json] == [f'big_{n:03}' for n in range(10, 110)]
+        assert r.headers['X-Next-Cursor'] == 'big_109'
+
+
+class Test_7_Export:
+    def test_7_1_export(self, client, session):
+        from json import loads
+
+        r = client.get('/export', auth=('admin_1', 'aA#45678'))
+        assert r.status_code == 200
+        assert r.mimetype == 'application/x-ndjson'
+
+        lines = [loads(n) for n in r.data.decode().splitlines()]
+        contracts = models.ContractModel.query.filter_by(retailer_pid='shop_1').all()
+
+        assert sorted(n['aid'] for n in lines) == sorted(c.aid for c in contracts)
+        for n in lines:
+            assert n['retailer_pid'] == 'shop_1'
+            assert n['transactions']
+
+    def test_7_2_export_range(self, client, session):
+        r = client.get('/export', auth=('admin_1', 'aA#45678'), query_string={'since': '2999-01-01T00:00:00'})
+        assert r.status_code == 200
+        assert r.data == b''
+
+    def test_7_3_export_auth(self, client, session):
+        r = client.get('/export')
+        assert r.status_code == 401
+
+    def test_7_4_contracts(self, client, session):
+        contracts = models.ContractModel.query.limit(3).all()
+        aids = [c.aid for c in contracts]
+
+        with count_queries() as statements:
+            r = client.get('/contracts', query_string={'aid': aids + ['no_contract']})
+        assert r.status_code == 200
+        assert len(statements) == 1
+
+        assert sorted(c['aid'] for c in r.json) == sorted(aids)
+        for c in r.json:
+            assert c['transactions']
+
+    def test_7_5_contracts_limit(self, client, session):
+        r = client.get('/contracts', query_string={'aid': [f'aid_{n}' for n in range(101)]})
+        assert r.status_code == 400
+
+
+class Test_8_Cache:
+    def test_8_1_hit(self, client, session):
+        from app import catalog
+        catalog.clear()
+
+        hits = catalog.hits
+        client.get('/products/section_1_1')
+        r = client.get('/products/section_1_1')
+        assert r.status_code == 200
+        assert catalog.hits == hits + 1
+
+        r = client.get('/cache')
+        assert r.status_code == 200
+        assert r.json['entries'] >= 1
+
+    def test_8_2_invalidate(self, client, session):
+        before = {p['pid']: p['in_stock'] for p in client.get('/products/section_1_1').json}
+
+        r = client.post('/import', json={'retailer_pid': 'shop_1', 'products': {'product_1_1': 4}})
+        assert r.status_code == 200
+
+        after = {p['pid']: p['in_stock'] for p in client.get('/products/section_1_1').json}
+        assert after['product_1_1'] == before['product_1_1'] + 4
+
+    def test_8_3_auth_not_cached(self, client, session):
+        from app import catalog
+
+        misses = catalog.misses
+        client.get('/products/section_1_1', auth=('admin_1', 'aA#45678'))
+        assert catalog.misses == misses
+
+    def test_8_4_etag(self, client, session):
+        r = client.get('/products/section_1_1')
+        etag = r.headers['ETag']
+
+        r = client.get('/products/section_1_1', headers={'If-None-Match': etag})
+        assert r.status_code == 304
+        assert r.data == b''
+
+        r = client.post('/import', json={'retailer_pid': 'shop_1', 'products': {'product_1_1': 1}})
+        assert r.status_code == 200
+
+        r = client.get('/products/section_1_1', headers={'If-None-Match': etag})
+        assert r.status_code == 200
+        assert r.headers['ETag'] != etag
+
+    def test_8_5_etag_auth(self, client, session):
+        anonymous = client.get('/sections/shop_1').headers['ETag']
+        admin = client.get('/sections/shop_1', auth=('admin_1', 'aA#45678')).headers['ETag']
+        assert anonymous != admin
+
+    def test_8_6_contract_etag(self, client, session):
+        aid = models.ContractModel.query.first().aid
+
+        r = client.get(f'/contract/{aid}')
+        assert r.status_code == 200
+
+        r = client.get(f'/contract/{aid}', headers={'If-None-Match': r.headers['ETag']})
+        assert r.status_code == 304
+
+    def test_8_7_contract_etag_cascade(self, client, session):
+        auth = ('admin_1', 'aA#45678')
+        data = {'section_pid': 'section_1_1', 'name': 'Product gone', 'about': 'About gone', 'price': 5, 'is_active': True}
+        assert client.post('/product/product_gone', json=data, auth=auth).status_code == 200
+
+        r = client.post('/import', json={'retailer_pid': 'shop_1', 'products': {'product_gone': 2, 'product_1_1': 1}})
+        aid = r.json['contract_aid']
+        etag = client.get(f'/contract/{aid}').headers['ETag']
+
+        # Delete cascades to transactions of the contract
+        assert client.delete('/product/product_gone', auth=auth).status_code == 200
+
+        # Fresh data (SQLite of tests does not enforce the cascade itself)
+        r = client.get(f'/contract/{aid}', headers={'If-None-Match': etag})
+        assert r.status_code == 200
+        assert r.headers['ETag'] != etag
+        assert r.json['aid'] == aid
+
+
+class Test_9_Idempotency:
+    def test_9_1_buy_replay(self, client, session):
+        data = {
+            'retailer_pid': 'shop_1',
+            'products': {'product_1_1': 1},
+            'pay_method': 'cash',
+        }
+        headers = {'Idempotency-Key': 'buy-key-1'}
+        in_stock = models.ProductModel.query.filter_by(pid='product_1_1').first().in_stock
+
+        first = client.post('/buy', json=data, headers=headers)
+        assert first.status_code == 200
+
+        with count_queries() as statements:
+            second = client.post('/buy', json=data, headers=headers)
+        assert second.status_code == 200
+        assert second.json == first.json
+        assert len(statements) == 1  # Key with contract and transactions
+
+        assert models.ProductModel.query.filter_by(pid='product_1_1').first().in_stock == in_stock - 1
+        assert models.ContractModel.query.filter_by(aid=first.json['contract_aid']).count() == 1
+
+    def test_9_2_import_replay(self, client, session):
+        data = {'retailer_pid': 'shop_1', 'products': {'product_1_2': 1}}
+        headers = {'Idempotency-Key': 'import-key-1'}
+
+        first = client.post('/import', json=data, headers=headers)
+        second = client.post('/import', json=data, headers=headers)
+        assert first.json == second.json
+
+        r = client.post('/import', json={**data, 'products': {'product_1_2': 2}}, headers=headers)
+        assert r.status_code == 422
+
+    def test_9_3_expire(self, app, client, session):
+        key = models.IdempotencyModel.query.get('import-key-1')
+        key.datetime = datetime(2000, 1, 1)
+        session.commit()
+
+        r = app.test_cli_runner().invoke(args=['stock', 'expire-keys'])
+        assert 'Deleted 1 ' in r.output
+        assert models.IdempotencyModel.query.get('import-key-1') is None
+
+
+class Test_10_Compress:
+    def test_10_1_response(self, client, session):
+        from gzip import decompress
+        from json import loads
+
+        plain = client.get('/products/section_1_1')
+        assert 'Content-Encoding' not in plain.headers
+
+        assert len(plain.data) >= 1024  # Bulk products of test_5_4
+
+        r = client.get('/products/section_1_1', headers={'Accept-Encoding': 'gzip'})
+        assert r.headers['Content-Encoding'] == 'gzip'
+        assert loads(decompress(r.data)) == plain.json
+        assert r.headers['ETag'].startswith('W/')
+
+        r = client.get('/products/section_1_1', headers={'Accept-Encoding': 'gzip', 'If-None-Match': r.headers['ETag']})
+        assert r.status_code == 304
+
+    def test_10_2_stream(self, client, session):
+        from gzip import decompress
+
+        plain = client.get('/export', auth=('admin_1', 'aA#45678'))
+        r = client.get('/export', auth=('admin_1', 'aA#45678'), headers={'Accept-Encoding': 'gzip'})
+        assert r.headers['Content-Encoding'] == 'gzip'
+        assert decompress(r.data) == plain.data
+
+    def test_10_3_request(self, client, session):
+        from gzip import compress
+        from json import dumps
+
+        body = compress(dumps({'retailer_pid': 'shop_1', 'products': {'product_1_2': 1}}).encode())
+        r = client.post('/import', data=body, headers={'Content-Encoding': 'gzip', 'Content-Type': 'application/json'})
+        assert r.status_code == 200
+
+        r = client.post('/import', data=b'not gzip', headers={'Content-Encoding': 'gzip', 'Content-Type': 'application/json'})
+        assert r.status_code == 400
+
+
+class Test_11_Rows:
+    def test_11_1_rows(self, client, session):
+        plain = client.get('/products/section_1_1')
+        r = client.get('/products/section_1_1', headers={'Accept': 'application/vnd.shop.rows+json'})
+        assert r.content_type == 'application/vnd.shop.rows+json'
+        assert 'Accept' in r.headers['Vary']
+
+        columns, *rows = r.json
+        assert [dict(zip(columns, row)) for row in rows] == plain.json
+        assert len(r.data) < len(plain.data)
+
+    def test_11_2_rows_error(self, client, session):
+        r = client.get('/products/no_section', headers={'Accept': 'application/vnd.shop.rows+json'})
+        assert r.status_code == 404
+        assert 'message' in r.json
+
+    def test_11_3_rows_etag(self, client, session):
+        rows = {'Accept': 'application/vnd.shop.rows+json'}
+
+        plain = client.get('/products/section_1_1')
+        r = client.get('/products/section_1_1', headers=rows)
+        assert r.headers['ETag'] != plain.headers['ETag']
+        assert r.content_type == 'application/vnd.shop.rows+json'
+        assert 'Accept' in plain.headers['Vary']
+
+        # Cached JSON is not served for rows, nor 304 for the JSON ETag
+        r = client.get('/products/section_1_1', headers={**rows, 'If-None-Match': plain.headers['ETag']})
+        assert r.status_code == 200
+        assert r.content_type == 'application/vnd.shop.rows+json'
+
+        r = client.get('/products/section_1_1', headers={**rows, 'If-None-Match': r.headers['ETag']})
+        assert r.status_code == 304
+        assert 'Accept' in r.headers['Vary']
+
+
+class Test_12_Credentials:
+    def test_12_1_cache(self, client, session):
+        from app import credentials
+
+        client.post('/admin', json={'pid': 'admin_cred', 'retailer_pid': 'shop_1', 'login': 'admin_cred', 'password': 'aA#45678'})
+
+        hits = credentials.hits
+        assert client.get('/admin', auth=('admin_cred', 'aA#45678')).status_code == 200
+        assert client.get('/admin', auth=('admin_cred', 'aA#45678')).status_code == 200
+        assert credentials.hits == hits + 1
+
+        assert client.get('/admin', auth=('admin_cred', 'bB#45678')).status_code == 401
+
+    def test_12_2_password_change(self, client, session):
+        r = client.patch('/admin', auth=('admin_cred', 'aA#45678'), json={'password': 'bB#45678'})
+        assert r.status_code == 200
+
+        assert client.get('/admin', auth=('admin_cred', 'aA#45678')).status_code == 401
+        assert client.get('/admin', auth=('admin_cred', 'bB#45678')).status_code == 200
+
+    def test_12_3_stale_hash(self, client, session):
+        from app import credentials
+
+        assert client.get('/admin', auth=('admin_cred', 'bB#45678')).status_code == 200
+
+        # Changed by another worker: only the hash in DB differs
+        admin = models.AdminModel.query.get('admin_cred')
+        admin.password = 'cC#45678'
+        session.commit()
+
+        misses = credentials.misses
+        assert client.get('/admin', auth=('admin_cred', 'bB#45678')).status_code == 401
+        assert credentials.misses == misses + 1
+
+
+class Test_13_Token:
+    def test_13_1_token(self, client, session):
+        r = client.post('/token', auth=('admin_1', 'aA#45678'))
+        assert r.status_code == 200
+        bearer = {'Authorization': f"Bearer {r.json['token']}"}
+
+        with count_queries() as statements:
+            r = client.get('/admin', headers=bearer)
+
+        assert r.status_code == 200
+        assert r.json == {'pid': 'admin_1', 'retailer_pid': 'shop_1', 'login': 'admin_1'}
+        assert statements == []
+
+        r = client.get('/export', headers=bearer)
+        assert r.status_code == 200
+
+    def test_13_2_invalid(self, app, client, session):
+        r = client.post('/token', auth=('admin_1', 'aA#45678'))
+        token = r.json['token']
+
+        assert client.get('/admin', headers={'Authorization': f'Bearer {token[:-2]}xx'}).status_code == 401
+        assert client.post('/token', headers={'Authorization': f'Bearer {token}'}).status_code == 401
+
+        app.config['AUTH_TOKEN_TTL'] = -1
+        try:
+            assert client.get('/admin', headers={'Authorization': f'Bearer {token}'}).status_code == 401
+        finally:
+            app.config['AUTH_TOKEN_TTL'] = 900
+
+    def test_13_3_other_service(self, app, client, session):
+        from app import tokens
+
+        # Manufacture admin with the same pid, signed with the same SECRET_KEY
+        app.config['AUTH_TOKEN_AUDIENCE'] = 'manufacture-admin'
+        try:
+            token = tokens.issue({'pid': 'admin_1', 'manufacture_pid': 'shop_1', 'login': 'admin_1'})
+        finally:
+            app.config['AUTH_TOKEN_AUDIENCE'] = 'retailer-admin'
+
+        assert client.get('/admin', headers={'Authorization': f'Bearer {token}'}).status_code == 401
+        assert client.delete('/admin', headers={'Authorization': f'Bearer {token}'}).status_code == 401
+
+        # Right service, claims of another principal
+        token = tokens.issue({'id': 1, 'login': 'admin_1'})
+        assert client.get('/admin', headers={'Authorization': f'Bearer {token}'}).status_code == 401
+
+
+class Test_14_Rehash:
+    def test_14_1_rehash(self, app, client, session):
+        from app import credentials
+
+        admin = models.AdminModel.query.get('admin_2')
+        assert admin.password_hash.startswith('pbkdf2:sha256:260000$')
+
+        app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+        try:
+            credentials.clear()
+            assert client.get('/admin', auth=('admin_2', 'aA#45678')).status_code == 200
+
+            admin = models.AdminModel.query.get('admin_2')
+            assert admin.password_hash.startswith('pbkdf2:sha256:1000$')
+            assert client.get('/admin', auth=('admin_2', 'aA#45678')).status_code == 200
+        finally:
+            app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:260000'
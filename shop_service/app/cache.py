@@ -0,0 +1,161 @@
+''' In-process cache of retailer service catalog lists.
+
+    Entry of a (path, query string) is fresh for CATALOG_CACHE_TTL seconds.
+    After that and for CATALOG_CACHE_STALE more seconds it is served as is,
+    while one background request revalidates it (with If-None-Match, so an
+    unchanged list costs upstream a 304). Older entries are fetched again
+    before answering. Only one upstream request per key runs at a time, all
+    the others wait for its result (single-flight).
+
+    Lists are asked for in rows format (see app.rows).
+
+    If retailer service can not be reached (or answers 5xx) the last known
+    copy is served, however old it is. Only without any copy the error goes
+    to the caller.
+'''
+from collections import OrderedDict
+from concurrent.futures import Future
+from threading import Lock, Thread
+from time import monotonic
+
+from requests import codes
+from requests.exceptions import ConnectionError, Timeout
+from werkzeug.datastructures import MultiDict
+
+from app.rows import ACCEPT, decode
+
+
+class Entry:
+    __slots__ = ('response', 'etag', 'time')
+
+    def __init__(self, response, etag):
+        self.response = response  # (status, data, headers)
+        self.etag = etag
+        self.time = monotonic()
+
+
+class CatalogCache:
+    # Upstream headers passed on to the caller
+    _headers = ('X-Next-Cursor', )
+
+    def __init__(self, client):
+        self.client = client
+        self.ttl = 5
+        self.stale = 60
+        self.size = 1024
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()  # key -> Entry
+        self._flights = {}             # key -> Future of upstream request
+        self._lock = Lock()
+
+    def init_app(self, app):
+        self.ttl = app.config['CATALOG_CACHE_TTL']
+        self.stale = app.config['CATALOG_CACHE_STALE']
+        self.size = app.config['CATALOG_CACHE_SIZE']
+
+    def get(self, path: str, params=None) -> tuple:
+        ''' Return (status, data, headers) of GET path. Raises ConnectionError
+            or Timeout only if there is no copy to serve.
+        '''
+        key = (path, tuple(sorted(MultiDict(params).items(multi=True))))
+
+        with self._lock:
+            if (entry := self._entries.get(key)) is not None:
+                self._entries.move_to_end(key)
+
+        if entry is not None and (age := monotonic() - entry.time) < self.ttl + self.stale:
+            self.hits += 1
+
+            if age >= self.ttl:
+                self._flight(key, path, params, entry, background=True)
+
+            return entry.response
+
+        self.misses += 1
+
+        try:
+            return self._flight(key, path, params, entry).result()
+
+        except (ConnectionError, Timeout):
+            if entry is None:
+                raise
+
+            return entry.response
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self._entries),
+            'size': self.size,
+        }
+
+    def _flight(self, key, path, params, entry, background=False) -> Future:
+        '''Return Future of the running upstream request of key, start one if none.'''
+        with self._lock:
+            if (future := self._flights.get(key)) is not None:
+                return future
+
+            future = self._flights[key] = Future()
+
+        if background:
+            Thread(target=self._fetch, args=(key, path, params, entry, future), daemon=True).start()
+        else:
+            self._fetch(key, path, params, entry, future)
+
+        return future
+
+    def _fetch(self, key, path, params, entry, future):
+        try:
+            headers = {'Accept': ACCEPT}
+            if entry is not None and entry.etag:
+                headers['If-None-Match'] = entry.etag
+
+            response = self.client.get(path, params=params, headers=headers)
+
+            if response.status_code == codes.not_modified and entry is not None:
+                self._store(key, Entry(entry.response, entry.etag))
+                future.set_result(entry.response)
+
+            elif response.status_code == codes.ok:
+                passed = {h: response.headers[h] for h in self._headers if h in response.headers}
+                result = (response.status_code, decode(response), passed)
+
+                self._store(key, Entry(result, response.headers.get('ETag')))
+                future.set_result(result)
+
+            elif response.status_code >= 500 and entry is not None:
+                future.set_result(entry.response)
+
+            else:
+                try:
+                    data = response.json()
+                except ValueError:
+                    data = None
+
+                # Error pages of proxies (nginx 502...) are not JSON
+                if not isinstance(data, dict):
+                    data = {'message': response.text}
+
+                future.set_result((response.status_code, data, {}))
+
+        except Exception as e:
+            future.set_exception(e)
+
+        finally:
+            with self._lock:
+                del self._flights[key]
+
+    def _store(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
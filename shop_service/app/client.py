@@ -0,0 +1,238 @@
+''' HTTP client of the retailer service.
+
+    One requests.Session (connection pool with keep-alive) per worker
+    process, so proxied calls reuse TCP connections instead of opening a new
+    one every time. Every call has connect and read timeouts. Idempotent GETs
+    are retried with jittered backoff on connection errors, timeouts and
+    502/503/504. POSTs are retried the same way only with Idempotency-Key
+    header (retailer answers a repeated one with the first result), without
+    it they are sent once (the retailer could have done it). JSON bodies of
+    COMPRESS_MIN_SIZE bytes or more are sent gzipped.
+
+    Calls go through a circuit breaker. When too many of the recent calls
+    failed (connection errors, timeouts, 5xx) or were too slow, it opens and
+    calls fail at once with CircuitOpenError (a ConnectionError, so callers
+    answer 503 as if retailer was unreachable) instead of holding workers.
+    After CIRCUIT_OPEN_TIME one probe call is let through (half-open), it
+    closes the circuit again or keeps it open.
+'''
+from collections import deque
+from gzip import compress
+from hashlib import sha256
+from json import dumps
+from os import getpid
+from random import uniform
+from threading import Lock
+from time import monotonic, sleep
+from uuid import uuid4
+
+from flask import request
+from requests import Session
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, Timeout
+
+
+def idempotency_key(*scope) -> str:
+    ''' Idempotency-Key for retailer service: Idempotency-Key of the request
+        made unique for scope (like user id), or a new one without it.
+    '''
+    if (key := request.headers.get('Idempotency-Key')) is None:
+        return uuid4().hex
+
+    return sha256(':'.join(map(str, (*scope, key))).encode()).hexdigest()
+
+
+class CircuitOpenError(ConnectionError):
+    pass
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self):
+        self.window = 20          # Recent calls to judge by
+        self.min_calls = 10       # Do not judge by less
+        self.failure_rate = 0.5
+        self.slow_call = 2.0      # Seconds
+        self.slow_rate = 0.5
+        self.open_time = 10.0     # Seconds before a probe
+
+        self.state = self.CLOSED
+        self.trips = 0
+        self.rejected = 0
+
+        self._calls = deque(maxlen=self.window)  # (failed, slow)
+        self._opened = 0.0
+        self._probing = False
+        self._lock = Lock()
+
+    def init_app(self, app):
+        self.window = app.config['CIRCUIT_WINDOW']
+        self.min_calls = app.config['CIRCUIT_MIN_CALLS']
+        self.failure_rate = app.config['CIRCUIT_FAILURE_RATE']
+        self.slow_call = app.config['CIRCUIT_SLOW_CALL']
+        self.slow_rate = app.config['CIRCUIT_SLOW_RATE']
+        self.open_time = app.config['CIRCUIT_OPEN_TIME']
+
+        self._calls = deque(maxlen=self.window)
+
+    def allow(self):
+        '''Raise CircuitOpenError if a call can not be made now.'''
+        with self._lock:
+            if self.state == self.OPEN and monotonic() - self._opened >= self.open_time:
+                self.state = self.HALF_OPEN
+
+            if self.state == self.CLOSED:
+                return
+
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+
+            self.rejected += 1
+
+        raise CircuitOpenError('Circuit to retailer service is open.')
+
+    def record(self, failed: bool, elapsed: float):
+        '''Record outcome of an allowed call.'''
+        slow = elapsed > self.slow_call
+
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probing = False
+
+                if failed or slow:
+                    self._open()
+                else:
+                    self.state = self.CLOSED
+                    self._calls.clear()
+
+                return
+
+            self._calls.append((failed, slow))
+
+            if self.state == self.CLOSED and len(self._calls) >= self.min_calls:
+                failures = sum(f for f, _ in self._calls) / len(self._calls)
+                slows = sum(s for _, s in self._calls) / len(self._calls)
+
+                if failures >= self.failure_rate or slows >= self.slow_rate:
+                    self._open()
+
+    def stats(self) -> dict:
+        with self._lock:
+            calls = len(self._calls) or 1
+
+            return {
+                'state': self.state,
+                'trips': self.trips,
+                'rejected': self.rejected,
+                'failure_rate': sum(f for f, _ in self._calls) / calls,
+                'slow_rate': sum(s for _, s in self._calls) / calls,
+            }
+
+    def _open(self):
+        self.state = self.OPEN
+        self.trips += 1
+        self._opened = monotonic()
+        self._calls.clear()
+
+
+class RetailerClient:
+    _retry_statuses = (502, 503, 504)
+
+    def __init__(self):
+        self.url = None
+        self.timeout = None
+        self.retries = 0
+        self.pool_size = 10
+        self.compress_min_size = 1024
+        self.compress_level = 6
+
+        self.breaker = CircuitBreaker()
+
+        self._session = None
+        self._pid = None
+        self._lock = Lock()
+
+    def init_app(self, app):
+        self.url = app.config['RETAILER_SERVICE_URL'].rstrip('/')
+        self.timeout = (app.config['RETAILER_CONNECT_TIMEOUT'], app.config['RETAILER_READ_TIMEOUT'])
+        self.retries = app.config['RETAILER_RETRIES']
+        self.pool_size = app.config['RETAILER_POOL_SIZE']
+        self.compress_min_size = app.config['COMPRESS_MIN_SIZE']
+        self.compress_level = app.config['COMPRESS_LEVEL']
+        self.breaker.init_app(app)
+
+    @property
+    def session(self) -> Session:
+        '''Session of this process, a forked worker must not share sockets.'''
+        with self._lock:
+            if self._pid != getpid():
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+
+                self._session = Session()
+                self._session.mount('http://', adapter)
+                self._session.mount('https://', adapter)
+                self._pid = getpid()
+
+            return self._session
+
+    def get(self, path: str, **kwargs):
+        '''GET path, retried up to self.retries times.'''
+        return self._retried('GET', path, **kwargs)
+
+    def post(self, path: str, idempotency_key: str = None, **kwargs):
+        '''POST path, retried like GET if idempotency_key is given.'''
+        if 'json' in kwargs:
+            kwargs = self._encode(**kwargs)
+
+        if idempotency_key is None:
+            return self._request('POST', path, **kwargs)
+
+        kwargs['headers'] = {**kwargs.get('headers', {}), 'Idempotency-Key': idempotency_key}
+        return self._retried('POST', path, **kwargs)
+
+    def _encode(self, json, **kwargs) -> dict:
+        '''Replace json with data, gzipped if large enough.'''
+        data = dumps(json).encode()
+        headers = {**kwargs.pop('headers', {}), 'Content-Type': 'application/json'}
+
+        if len(data) >= self.compress_min_size:
+            data = compress(data, self.compress_level)
+            headers['Content-Encoding'] = 'gzip'
+
+        return {**kwargs, 'data': data, 'headers': headers}
+
+    def _retried(self, method: str, path: str, **kwargs):
+        for attempt in range(self.retries + 1):
+            last = attempt == self.retries
+
+            try:
+                response = self._request(method, path, **kwargs)
+
+            except CircuitOpenError:
+                raise
+
+            except (ConnectionError, Timeout):
+                if last:
+                    raise
+
+            else:
+                if last or response.status_code not in self._retry_statuses:
+                    return response
+
+            sleep(uniform(0, 0.05 * 2 ** attempt))
+
+    def _request(self, method: str, path: str, **kwargs):
+        self.breaker.allow()
+        start = monotonic()
+
+        try:
+            response = self.session.request(method, self.url + path, timeout=self.timeout, **kwargs)
+
+        except Exception:
+            self.breaker.record(True, monotonic() - start)  # Frees a probe too
+            raise
+
+        self.breaker.record(response.status_code >= 500, monotonic() - start)
+        return response
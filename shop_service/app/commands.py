@@ -0,0 +1,85 @@
+''' Queue commands, run them as `flask orders <command>`.
+'''
+from datetime import datetime, timedelta
+from time import sleep
+from uuid import uuid4
+
+import click
+from flask import Blueprint, current_app
+from requests import codes
+from requests.exceptions import ConnectionError, Timeout
+
+from app import db, retailer
+from app.models import HistoryModel, OrderModel
+
+commands = Blueprint('commands', __name__, cli_group='orders')
+
+
+def send_order(order: OrderModel) -> bool:
+    ''' Send order to retailer service and store the outcome (not commited).
+        Return False if it was put back to the queue to retry later.
+    '''
+    try:
+        response = retailer.post('/buy', order.key, json=order.payload)
+
+    except (ConnectionError, Timeout):
+        response = None
+
+    if response is not None and response.status_code == codes.ok:
+        data = response.json()
+
+        HistoryModel.add_from_buy(order.user_id, data)
+        order.status = OrderModel.DONE
+        order.contract = data['contract_aid']
+
+    elif response is not None and response.status_code < 500:
+        order.status = OrderModel.FAILED
+        order.errors = response.json()
+
+    # Retailer service is unavailable, try again later
+    else:
+        order.attempts += 1
+        order.claim = None
+
+        if order.attempts >= current_app.config['ORDER_ATTEMPTS']:
+            order.status = OrderModel.FAILED
+            order.errors = {'message': 'Could not get in touch with retailer service...'}
+            return True
+
+        backoff = current_app.config['ORDER_RETRY_BACKOFF'] * 2 ** (order.attempts - 1)
+        order.retry_at = datetime.utcnow() + timedelta(seconds=backoff)
+        return False
+
+    return True
+
+
+def drain(size: int) -> int:
+    ''' Claim a batch of queued orders and send them one by one, retailer
+        /buy takes one order a request. Each outcome is commited on its own.
+        Return number of orders sent (done or failed), put back ones are not
+        counted.
+    '''
+    stale = datetime.utcnow() - timedelta(seconds=current_app.config['ORDER_CLAIM_TIMEOUT'])
+    sent = 0
+
+    for order in OrderModel.claim_batch(uuid4().hex, size, stale):
+        sent += send_order(order)
+        db.session.commit()
+
+    return sent
+
+
+@commands.cli.command('drain')
+@click.option('--batch', default=50, show_default=True, help='Orders claimed at once.')
+@click.option('--forever', is_flag=True, help='Keep draining, sleep when a pass sends nothing.')
+@click.option('--idle', default=1.0, show_default=True, help='Seconds to sleep when a pass sends nothing.')
+def drain_command(batch, forever, idle):
+    '''Send queued orders to retailer service.'''
+    while True:
+        while (sent := drain(batch)):
+            click.echo(f'Sent {sent} orders.')
+
+        if not forever:
+            return
+
+        sleep(idle)
@@ -4,3 +4,4 @@ models = Blueprint('models', __name__)
 
 from .user import UserModel
 from .history import HistoryModel
+from .order import OrderModel
@@ -1,8 +1,56 @@
+from flask_restx import inputs
+
 from app import db
 
 
 class HistoryModel(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.String(32), db.ForeignKey('user_model.id', onupdate='CASCADE', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user_model.id', onupdate='CASCADE', ondelete='CASCADE'), nullable=False)
 
     contract = db.Column(db.String(80))
+
+    # Receipt, snapshot of the contract made at buy time. Contracts never
+    # change, so it is served instead of asking retailer service. Empty for
+    # rows made before receipts were stored.
+    retailer_pid = db.Column(db.String(32))
+    pay_method = db.Column(db.String(32))
+    datetime = db.Column(db.DateTime)
+    items = db.Column(db.JSON)  # [{product_pid, amount, sold_at}, ...]
+
+    __table_args__ = (
+        db.Index('ix_history_model_user_id_id', 'user_id', 'id'),  # Pages of a user
+    )
+
+    @staticmethod
+    def from_buy(user_id, data: dict):
+        '''Make a row with receipt from retailer service /buy response.'''
+        contract = data['contract']
+
+        return HistoryModel(
+            user_id=user_id,
+            contract=data['contract_aid'],
+            retailer_pid=contract['retailer_pid'],
+            pay_method=contract['pay_method'],
+            datetime=inputs.datetime_from_iso8601(contract['datetime']),
+            items=contract['transactions'],
+        )
+
+    @staticmethod
+    def add_from_buy(user_id, data: dict) -> None:
+        '''Add from_buy() row to session, unless it is a replayed buy.'''
+        if HistoryModel.query.filter_by(user_id=user_id, contract=data['contract_aid']).first() is None:
+            db.session.add(HistoryModel.from_buy(user_id, data))
+
+    @property
+    def receipt(self) -> dict:
+        '''Contract in retailer service format, None if not stored.'''
+        if self.items is None:
+            return None
+
+        return {
+            'aid': self.contract,
+            'retailer_pid': self.retailer_pid,
+            'pay_method': self.pay_method,
+            'datetime': self.datetime,
+            'transactions': self.items,
+        }
@@ -0,0 +1,67 @@
+from datetime import datetime
+from uuid import uuid4
+
+from sqlalchemy import or_, update
+
+from app import db
+
+
+class OrderModel(db.Model):
+    ''' Queued buy request (async /buy). A drainer (`flask orders drain`)
+        claims a batch of queued orders, sends them to retailer service one
+        by one (/buy takes one order) and stores the outcome of each. Claim
+        of a drainer that died expires after ORDER_CLAIM_TIMEOUT and the
+        order is claimed again. An order put back because retailer service
+        was unavailable is not claimed before its retry_at.
+    '''
+    QUEUED, DONE, FAILED = 'queued', 'done', 'failed'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user_model.id', onupdate='CASCADE', ondelete='CASCADE'), nullable=False)
+
+    payload = db.Column(db.JSON, nullable=False)  # Body of retailer /buy
+    key = db.Column(db.String(64), nullable=False, default=lambda: uuid4().hex)  # Idempotency-Key, resends are safe
+    status = db.Column(db.String(16), nullable=False, default=QUEUED)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    datetime = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    claim = db.Column(db.String(32), index=True)
+    claimed_at = db.Column(db.DateTime)
+    retry_at = db.Column(db.DateTime)  # Not claimed before, backoff after a failed send
+
+    contract = db.Column(db.String(80))  # When done
+    errors = db.Column(db.JSON)          # When failed
+
+    __table_args__ = (
+        db.Index('ix_order_model_status_id', 'status', 'id'),  # Draining
+    )
+
+    @staticmethod
+    def claim_batch(token: str, size: int, stale: datetime) -> list:
+        ''' Mark up to size oldest queued orders (not claimed, or claimed
+            before stale, and due to retry) with token and return them.
+        '''
+        now = datetime.utcnow()
+        claimable = (
+            OrderModel.status == OrderModel.QUEUED,
+            or_(OrderModel.claim.is_(None), OrderModel.claimed_at < stale),
+            or_(OrderModel.retry_at.is_(None), OrderModel.retry_at <= now),
+        )
+
+        ids = [
+            id for id, in db.session.query(OrderModel.id).
+            filter(*claimable).order_by(OrderModel.id).limit(size)
+        ]
+        if not ids:
+            return []
+
+        # Conditions again: other drainer could claim some of them meanwhile
+        db.session.execute(
+            update(OrderModel).
+            where(OrderModel.id.in_(ids), *claimable).
+            values(claim=token, claimed_at=now).
+            execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+        return OrderModel.query.filter_by(claim=token).order_by(OrderModel.id).all()
@@ -1,9 +1,10 @@
 from datetime import datetime
 
 from flask import g
-from werkzeug.security import check_password_hash, generate_password_hash
+from werkzeug.security import check_password_hash
 
-from app import db, auth
+from app import db, basic_auth, credentials, token_auth, tokens
+from app.credentials import hash_password, needs_rehash
 
 
 class UserModel(db.Model):
@@ -24,21 +25,40 @@ class UserModel(db.Model):
         self.set_password(password)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
+    @property
+    def claims(self):
+        '''What a bearer token of this user carries.'''
+        return {'id': self.id, 'login': self.login}
+
     @classmethod
     def get_by_login(cls, login):
         return cls.query.filter_by(login=login).first()
 
     @staticmethod
-    @auth.verify_password
+    @basic_auth.verify_password
     def verify_password(login, password):
         user = UserModel.query.filter_by(login=login).first()
 
-        if not user or not user.check_password(password):
+        if not user or not credentials.verify(login, password, user.password_hash, user.check_password):
+            return False
+
+        # Hashed with outdated method or cost
+        if needs_rehash(user.password_hash):
+            user.set_password(password)
+            db.session.commit()
+
+        g.user = user
+        return True
+
+    @staticmethod
+    @token_auth.verify_token
+    def verify_token(token):
+        if (user := tokens.verify(token, 'id', 'login')) is None:
             return False
 
         g.user = user
@@ -6,5 +6,8 @@ from .user import User
 from .retailers import Retailers
 from .sections import Sections
 from .products import Products
-from .buy import Buy
-from .history import History, Contract
+from .buy import Buy, Order
+from .history import History, HistoryFull, Contract
+from .storefront import Storefront
+from .circuit import Circuit
+from .token import Token
@@ -0,0 +1,10 @@
+from flask_restx import reqparse
+
+# Retailer service lists are paginated by pid: pass limit/cursor through and
+# return its X-Next-Cursor header back (no header -> last page), see
+# CatalogCache._headers.
+
+_ = page_args = reqparse.RequestParser()
+_.add_argument('limit', type=int, location='args', help='Page size, 1 - 1000 (whole list if no limit and cursor)')
+_.add_argument('cursor', type=str, location='args', help='X-Next-Cursor of the previous page')
+
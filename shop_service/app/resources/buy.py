@@ -1,11 +1,11 @@
-from requests import session, codes
-from requests.exceptions import ConnectionError, ConnectTimeout
+from requests.exceptions import ConnectionError, Timeout
 
 from flask import g, request
-from flask_restx import Resource, abort
+from flask_restx import Resource, abort, fields
 
-from app import api, auth, db
-from app.models import HistoryModel
+from app import api, auth, db, retailer
+from app.client import idempotency_key
+from app.models import HistoryModel, OrderModel
 
 
 # Namespace parameters
@@ -22,33 +22,81 @@ _.add_argument('retailer_pid', type=str, required=True, help='Retailers pid')
 _.add_argument('products', type=dict[str, int], required=True, help='Retailers pid')
 # products -> {product_pid: amount, ...}
 _.add_argument('pay_method', type=str, required=True, help='Pay method')
+_.add_argument('Prefer', type=str, location='headers', help='"respond-async" to queue the order (202)')
+_.add_argument('Idempotency-Key', type=str, location='headers', help='Repeated request with the key gets the first result')
+
+
+# Output
+order_model = ns.model('OrderModel', {
+    'id': fields.Integer(
+        description='ID',
+        example=1,
+    ),
+    'status': fields.String(
+        description='queued/done/failed',
+        example='done',
+    ),
+    'contract': fields.String(
+        description='Contract aid, when done',
+        example='01GRZ7V1J4Q6T2YB9W0PKX3E8M',
+    ),
+    'errors': fields.Raw(
+        description='Retailer service errors, when failed',
+        example={'message': 'Demand is too high.'},
+    ),
+    'datetime': fields.DateTime(
+        description='When the order was made',
+        example='2020-10-10 05:05:25.000000',
+    ),
+})
 
 
 @ns.route('/buy')
 class Buy(Resource):
     @auth.login_required
+    @ns.expect(post_buy)
     @ns.response(401, description='Invalid or missing user credentials')
     @ns.response(201, description='Buy request was succesful.')
+    @ns.response(202, description='Order is queued, see Location.')
     def post(self):
         '''Send a buy request to retailer service'''
-        try:
-            with session() as s:
-                response = s.post(f'http://localhost:5002/buy', json=request.json)
+        if 'respond-async' in request.headers.get('Prefer', ''):
+            post_buy.parse_args()
 
-                if response.status_code == 200:
-                    data = response.json()
+            order = OrderModel(user_id=g.user.id, payload=request.json, key=idempotency_key('shop', g.user.id))
 
-                    cheque = HistoryModel(
-                        user_id=g.user.id,
-                        contract=data['contract_aid'],
-                    )
+            db.session.add(order)
+            db.session.commit()
+
+            return {'order_id': order.id}, 202, {'Location': f'/order/{order.id}'}
+
+        try:
+            response = retailer.post('/buy', idempotency_key('shop', g.user.id), json=request.json)
 
-                    db.session.add(cheque)
-                    db.session.commit()
+            if response.status_code == 200:
+                data = response.json()
 
-                    return data
+                HistoryModel.add_from_buy(g.user.id, data)
+                db.session.commit()
 
-                abort(response.status_code, **response.json())
+                return data
 
-        except (ConnectionError, ConnectTimeout):
+            abort(response.status_code, **response.json())
+
+        except (ConnectionError, Timeout):
             abort(503, message='Could not get in touch with retailer service...')
+
+
+@ns.route('/order/<int:order_id>')
+class Order(Resource):
+    @auth.login_required
+    @ns.response(401, 'Invalid or missing user credentials')
+    @ns.response(404, 'Order not found.')
+    @ns.marshal_with(order_model)
+    def get(self, order_id):
+        '''Status of a queued order'''
+        order = OrderModel.query.filter_by(id=order_id, user_id=g.user.id).first()
+        if not order:
+            abort(404, 'Order not found.')
+
+        return order
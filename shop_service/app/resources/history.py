@@ -1,10 +1,10 @@
-from requests import codes, request, session
-from requests.exceptions import ConnectionError, ConnectTimeout
+from requests import codes
+from requests.exceptions import ConnectionError, Timeout
 
 from flask import g
-from flask_restx import Resource, abort, fields
+from flask_restx import Resource, abort, fields, reqparse
 
-from app import api, auth
+from app import api, auth, retailer
 from app.models import HistoryModel
 
 # Namespace parameters
@@ -15,6 +15,12 @@ ns = api.namespace(
 )
 
 
+# Input
+_ = history_page_args = reqparse.RequestParser()
+_.add_argument('limit', type=int, location='args', default=20, help='Page size, 1 - 100')
+_.add_argument('cursor', type=int, location='args', help='X-Next-Cursor of the previous page')
+
+
 # Output
 history_model = ns.model('HistoryModel', {
     'id': fields.Integer(
@@ -49,6 +55,11 @@ contract_model = ns.model('ContractModel (external)', {
 })
 
 
+history_full_model = ns.inherit('HistoryFullModel', history_model, {
+    'details': fields.Nested(contract_model, allow_null=True, description='Contract, null if retailer does not know it'),
+})
+
+
 @ns.route('/history')
 class History(Resource):
     @auth.login_required
@@ -59,6 +70,54 @@ class History(Resource):
         return HistoryModel.query.filter_by(user_id=g.user.id).all()
 
 
+@ns.route('/history/full')
+class HistoryFull(Resource):
+    @auth.login_required
+    @ns.expect(history_page_args)
+    @ns.response(401, 'Invalid or missing user credentials')
+    @ns.response(400, 'Invalid page.')
+    @ns.response(503, 'Retailer service is unavailable.')
+    @ns.marshal_with(history_full_model, True, 200, 'Page of contacts (chequecs) with details, newest first.')
+    def get(self):
+        '''History of users shopping with contract details'''
+        args = history_page_args.parse_args()
+
+        if not (0 < (limit := args['limit']) <= 100):
+            abort(400, limit=f'Limit must be in range 0 < limit <= 100, got {limit}.')
+
+        # Keyset pagination by id, newest first
+        query = HistoryModel.query.filter_by(user_id=g.user.id)
+        if (cursor := args['cursor']) is not None:
+            query = query.filter(HistoryModel.id < cursor)
+
+        history = query.order_by(HistoryModel.id.desc()).limit(limit + 1).all()
+
+        headers = {}
+        if len(history) > limit:
+            history = history[:limit]
+            headers['X-Next-Cursor'] = history[-1].id
+
+        # Only rows without a receipt are asked from retailer service
+        contracts = {h.contract: h.receipt for h in history if h.receipt is not None}
+
+        if missing := [h.contract for h in history if h.contract not in contracts]:
+            try:
+                response = retailer.get('/contracts', params={'aid': missing})
+
+                if response.status_code != codes.ok:
+                    abort(response.status_code, **response.json())
+
+            except (ConnectionError, Timeout):
+                abort(503, message='Could not get in touch with retailer service...')
+
+            contracts.update((c['aid'], c) for c in response.json())
+
+        return [
+            {'id': h.id, 'contract': h.contract, 'details': contracts.get(h.contract)}
+            for h in history
+        ], 200, headers
+
+
 @ns.route('/history/<contact_aid>')
 class Contract(Resource):
     @auth.login_required
@@ -67,17 +126,20 @@ class Contract(Resource):
     @ns.marshal_with(contract_model)
     def get(self, contact_aid):
         '''Detailed shopping contract (cheque)'''
+        history = HistoryModel.query.filter_by(user_id=g.user.id, contract=contact_aid).first()
+        if history is not None and history.receipt is not None:
+            return history.receipt
+
         try:
-            with session() as s:
-                response = s.get(f'http://localhost:5002/contract/{contact_aid}')
+            response = retailer.get(f'/contract/{contact_aid}')
 
-                if response.status_code == 200:
-                    return response.json()
+            if response.status_code == 200:
+                return response.json()
 
-                if response.status_code == 404:
-                    abort(404, 'Contact not found.')
+            if response.status_code == 404:
+                abort(404, 'Contact not found.')
 
-                abort(response.status_code, **response.json())
+            abort(response.status_code, **response.json())
 
-        except (ConnectionError, ConnectTimeout):
+        except (ConnectionError, Timeout):
             abort(503, message='Could not get in touch with retailer service...')
@@ -1,9 +1,12 @@
-from requests import session, codes
-from requests.exceptions import ConnectionError, ConnectTimeout
+from requests import codes
+from requests.exceptions import ConnectionError, Timeout
 
+from flask import request
 from flask_restx import Resource, abort, fields
 
-from app import api
+from app import api, catalog
+from app.rows import marshal_rows_with
+from ._page import page_args
 
 
 # Namespace parameters
@@ -45,18 +48,18 @@ product_model = ns.model('ProductModel', {
 
 @ns.route('/products/<section_pid>')
 class Products(Resource):
+    @ns.expect(page_args)
     @ns.response(503, 'Retailer service is unavailable.')
-    @ns.marshal_with(product_model)
+    @marshal_rows_with(ns, product_model)
     def get(self, section_pid):
         '''Get list of all retailer products'''
         try:
-            with session() as s:
-                response = s.get(f'http://localhost:5002/products/{section_pid}')
+            status, data, headers = catalog.get(f'/products/{section_pid}', request.args)
 
-                if response.status_code == codes.ok:
-                    return response.json()
+            if status == codes.ok:
+                return data, 200, headers
 
-                abort(response.status_code, **response.json())
+            abort(status, **data)
 
-        except (ConnectionError, ConnectTimeout):
+        except (ConnectionError, Timeout):
             abort(503, message='Could not get in touch with retailer service...')
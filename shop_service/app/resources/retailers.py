@@ -1,9 +1,12 @@
-from requests import session, codes
-from requests.exceptions import ConnectionError, ConnectTimeout
+from requests import codes
+from requests.exceptions import ConnectionError, Timeout
 
+from flask import request
 from flask_restx import Resource, abort, fields
 
-from app import api
+from app import api, catalog
+from app.rows import marshal_rows_with
+from ._page import page_args
 
 
 # Namespace parameters
@@ -38,18 +41,18 @@ retailer_model = ns.model('RetailerModel', {
 @ns.route('/retailers')
 class Retailers(Resource):
     # User (no auth) level access
+    @ns.expect(page_args)
     @ns.response(503, 'Retailer service is unavailable')
-    @ns.marshal_with(retailer_model, code=200, description='List of retailers')
+    @marshal_rows_with(ns, retailer_model, code=200, description='List of retailers')
     def get(self):
         '''Get list of retailers'''
         try:
-            with session() as s:
-                response = s.get('http://localhost:5002/retailers')
+            status, data, headers = catalog.get('/retailers', request.args)
 
-                if response.status_code == codes.ok:
-                    return response.json()
+            if status == codes.ok:
+                return data, 200, headers
 
-                abort(response.status_code, **response.json())
+            abort(status, **data)
 
-        except (ConnectionError, ConnectTimeout):
+        except (ConnectionError, Timeout):
             abort(503, message='Could not get in touch with retailer service...')
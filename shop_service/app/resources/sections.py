@@ -1,9 +1,12 @@
-from requests import session, codes
-from requests.exceptions import ConnectionError, ConnectTimeout
+from requests import codes
+from requests.exceptions import ConnectionError, Timeout
 
+from flask import request
 from flask_restx import Resource, abort, fields
 
-from app import api
+from app import api, catalog
+from app.rows import marshal_rows_with
+from ._page import page_args
 
 
 # Namespace parameters
@@ -41,18 +44,18 @@ section_model = ns.model('SectionModel', {
 
 @ns.route('/sections/<retailer_pid>')
 class Sections(Resource):
+    @ns.expect(page_args)
     @ns.response(503, 'Retailer service is unavailable.')
-    @ns.marshal_with(section_model, code=200, description='List of retailer sections.')
+    @marshal_rows_with(ns, section_model, code=200, description='List of retailer sections.')
     def get(self, retailer_pid):
         '''Get list of all retailer sections'''
         try:
-            with session() as s:
-                response = s.get(f'http://localhost:5002/sections/{retailer_pid}')
+            status, data, headers = catalog.get(f'/sections/{retailer_pid}', request.args)
 
-                if response.status_code == codes.ok:
-                    return response.json()
+            if status == codes.ok:
+                return data, 200, headers
 
-                abort(response.status_code, **response.json())
+            abort(status, **data)
 
-        except (ConnectionError, ConnectTimeout):
+        except (ConnectionError, Timeout):
             abort(503, message='Could not get in touch with retailer service...')
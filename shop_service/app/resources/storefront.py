@@ -0,0 +1,99 @@
+from concurrent.futures import ThreadPoolExecutor
+from json import dumps
+
+from requests import codes
+from requests.exceptions import ConnectionError, Timeout
+
+from flask import Response, current_app, stream_with_context
+from flask_restx import Resource, abort
+
+from app import api, catalog
+from app.rows import join, marshal_rows
+from .products import product_model
+from .retailers import retailer_model
+from .sections import section_model
+
+
+# Namespace parameters
+ns = api.namespace(
+    'Storefront',
+    description='Get all retailers with their sections and products at once.',
+    path='/',
+)
+
+
+def fetch_all(path: str) -> list:
+    ''' Return all pages of upstream list, None if upstream refused it (like
+        404). Raises ConnectionError/Timeout if there is no copy.
+    '''
+    pages, params = [], {'limit': '1000'}
+
+    while True:
+        status, data, headers = catalog.get(path, params)
+        if status != codes.ok:
+            return None
+
+        pages.append(data)
+
+        if (cursor := headers.get('X-Next-Cursor')) is None:
+            return join(pages)
+
+        params = {'limit': '1000', 'cursor': cursor}
+
+
+def try_fetch_all(path: str) -> list:
+    '''fetch_all() for background threads, None on errors.'''
+    try:
+        return fetch_all(path)
+    except (ConnectionError, Timeout):
+        return None
+
+
+@ns.route('/storefront')
+class Storefront(Resource):
+    @ns.response(503, 'Retailer service is unavailable.')
+    @ns.response(200, 'JSON array of retailers with "sections", each with '
+                      '"products". Lists that could not be fetched are null.')
+    def get(self):
+        '''Get retailers -> sections -> products tree'''
+        try:
+            retailers = marshal_rows(fetch_all('/retailers') or [], retailer_model)
+        except (ConnectionError, Timeout):
+            abort(503, message='Could not get in touch with retailer service...')
+
+        workers = current_app.config['STOREFRONT_WORKERS']
+
+        def generate():
+            with ThreadPoolExecutor(workers) as pool:
+                # Products of a retailer are requested as soon as its
+                # sections came, not after all sections
+                def sections_of(retailer_pid):
+                    if (sections := try_fetch_all(f'/sections/{retailer_pid}')) is None:
+                        return None
+
+                    return [
+                        (s, pool.submit(try_fetch_all, f"/products/{s['pid']}"))
+                        for s in marshal_rows(sections, section_model)
+                    ]
+
+                futures = [pool.submit(sections_of, r['pid']) for r in retailers]
+
+                yield '['
+
+                for n, (retailer, future) in enumerate(zip(retailers, futures)):
+                    sections = future.result()
+
+                    if sections is not None:
+                        sections = [
+                            {
+                                **section,
+                                'products': None if (p := products.result()) is None else marshal_rows(p, product_model),
+                            }
+                            for section, products in sections
+                        ]
+
+                    yield (',' if n else '') + dumps({**retailer, 'sections': sections})
+
+                yield ']'
+
+        return Response(stream_with_context(generate()), mimetype='application/json')
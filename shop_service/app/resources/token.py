@@ -0,0 +1,25 @@
+from flask import current_app, g
+from flask_restx import Resource, fields
+
+from app import api, basic_auth, tokens
+
+ns = api.namespace('token', description='Exchange user login and password for a bearer token.', path='/')
+
+
+token_model = api.model('TokenModel', {
+    'token': fields.String(required=True, description='Send it as "Authorization: Bearer <token>"', example='eyJpZCI6MX0.ZaBcDe.3k...'),
+    'expires_in': fields.Integer(required=True, description='Seconds the token is valid', example=900),
+})
+
+
+@ns.route('/token')
+class Token(Resource):
+    @basic_auth.login_required
+    @ns.response(401, description='Invalid or missing user credentials')
+    @ns.marshal_with(token_model)
+    def post(self):
+        '''Returns a bearer token of the user'''
+        return {
+            'token': tokens.issue(g.user.claims),
+            'expires_in': current_app.config['AUTH_TOKEN_TTL'],
+        }
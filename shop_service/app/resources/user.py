@@ -1,7 +1,7 @@
 from flask import g
-from flask_restx import Resource, fields, reqparse
+from flask_restx import Resource, abort, fields, reqparse
 
-from app import api, auth, db
+from app import api, auth, credentials, db
 from app.models import UserModel
 
 ns = api.namespace('user', description='User manipulation.', path='/')
@@ -32,6 +32,14 @@ user_model = api.model('UserModel', {
 })
 
 
+def current_user() -> UserModel:
+    '''Row of the authenticated user (a bearer token only has its id).'''
+    if (user := UserModel.query.get(g.user.id)) is None:
+        abort(401, message='User does not exist.')
+
+    return user
+
+
 @ns.route('/user')
 class User(Resource):
     # @ns.doc(params=user_parameters)
@@ -61,7 +69,7 @@ class User(Resource):
     @ns.marshal_with(user_model)
     def get(self):
         '''Returns the current user'''
-        return g.user
+        return current_user()
 
     @auth.login_required
     # @ns.doc(params=user_parameters)
@@ -71,30 +79,34 @@ class User(Resource):
     def patch(self):
         '''Updates the current user.'''
         args = edit_user_args.parse_args()
+        user = current_user()
+        credentials.forget(user.login)
 
         if args['login'] is not None:
-            g.user.login = args['login']
+            user.login = args['login']
 
         if args['password'] is not None:
-            g.user.password = args['password']
+            user.password = args['password']
 
         if args['email'] is not None:
-            g.user.email = args['email']
+            user.email = args['email']
 
         if args['first_name'] is not None:
-            g.user.first_name = args['first_name']
+            user.first_name = args['first_name']
 
         if args['last_name'] is not None:
-            g.user.last_name = args['last_name']
+            user.last_name = args['last_name']
 
         db.session.commit()
-        return g.user
+        return user
 
     @auth.login_required
     @ns.response(401, description='Invalid or missing user credentials')
     @ns.response(200, description='User was deleted succesfuly.')
     def delete(self):
         '''Deletes the current user '''
-        db.session.delete(g.user)
+        user = current_user()
+        credentials.forget(user.login)
+        db.session.delete(user)
         db.session.commit()
         return {'message': 'done'}
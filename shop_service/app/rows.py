@@ -0,0 +1,80 @@
+''' Row format of retailer service lists (application/vnd.shop.rows+json).
+
+    A list comes as an array of arrays, the first one is the column names:
+
+        [["pid", "name"], ["summer_sail", "Summer Sail"], ...]
+
+    It is smaller and quicker to parse than a list of objects. The rows are
+    already marshalled by retailer with the same fields, so views pick the
+    columns of their model (marshal_rows) instead of marshalling every object
+    once more. Plain JSON lists (of an older retailer) are marshalled as
+    before.
+'''
+from functools import wraps
+
+from flask_restx import marshal
+
+ROWS = 'application/vnd.shop.rows+json'
+ACCEPT = f'{ROWS}, application/json;q=0.5'
+
+
+class Rows(list):
+    '''List of dicts that came as rows, with their columns.'''
+    def __init__(self, columns, items=()):
+        super().__init__(items)
+        self.columns = columns
+
+
+def decode(response):
+    '''JSON body of retailer response, rows turned into a Rows list.'''
+    data = response.json()
+
+    if response.headers.get('Content-Type', '').startswith(ROWS) and isinstance(data, list):
+        if not data:
+            return Rows([])
+
+        columns, *rows = data
+        return Rows(columns, [dict(zip(columns, row)) for row in rows])
+
+    return data
+
+
+def join(pages: list) -> list:
+    '''Join pages of a list, Rows stay Rows if they all have same columns.'''
+    items = [item for page in pages for item in page]
+
+    if pages and all(isinstance(p, Rows) and p.columns == pages[0].columns for p in pages):
+        return Rows(pages[0].columns, items)
+
+    return items
+
+
+def marshal_rows(data, model) -> list:
+    ''' marshal(data, model) of a list. Rows with exactly the model fields
+        are returned as they are, rows with more fields are cut down to them.
+    '''
+    if not isinstance(data, Rows) or not set(model) <= set(data.columns):
+        return marshal(data, model)
+
+    if list(model) == data.columns:
+        return data
+
+    return [{key: item[key] for key in model} for item in data]
+
+
+def marshal_rows_with(ns, model, code=200, description='Success'):
+    '''ns.marshal_with(model, as_list=True) that uses marshal_rows.'''
+    def decorator(f):
+        @ns.response(code, description, [model])
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            value = f(*args, **kwargs)
+
+            if isinstance(value, tuple):
+                return (marshal_rows(value[0], model), *value[1:])
+
+            return marshal_rows(value, model)
+
+        return wrapper
+
+    return decorator
@@ -4,3 +4,37 @@ SECRET_KEY = environ.get('SECRET_KEY')
 SQLALCHEMY_DATABASE_URI = environ.get('SQLALCHEMY_DATABASE_URI')
 SQLALCHEMY_TRACK_MODIFICATIONS = False
 RESTX_ERROR_404_HELP = False
+
+RETAILER_SERVICE_URL = environ.get('RETAILER_SERVICE_URL', 'http://localhost:5002')
+RETAILER_CONNECT_TIMEOUT = float(environ.get('RETAILER_CONNECT_TIMEOUT', 1))  # Seconds
+RETAILER_READ_TIMEOUT = float(environ.get('RETAILER_READ_TIMEOUT', 10))  # Seconds
+RETAILER_RETRIES = int(environ.get('RETAILER_RETRIES', 2))  # GETs only
+RETAILER_POOL_SIZE = int(environ.get('RETAILER_POOL_SIZE', 10))  # Connections per worker
+
+CATALOG_CACHE_TTL = float(environ.get('CATALOG_CACHE_TTL', 5))  # Seconds fresh
+CATALOG_CACHE_STALE = float(environ.get('CATALOG_CACHE_STALE', 60))  # Seconds served while revalidating
+CATALOG_CACHE_SIZE = int(environ.get('CATALOG_CACHE_SIZE', 1024))  # Responses
+
+STOREFRONT_WORKERS = int(environ.get('STOREFRONT_WORKERS', 8))  # Concurrent upstream requests per /storefront
+
+CIRCUIT_WINDOW = int(environ.get('CIRCUIT_WINDOW', 20))  # Recent calls to retailer service
+CIRCUIT_MIN_CALLS = int(environ.get('CIRCUIT_MIN_CALLS', 10))
+CIRCUIT_FAILURE_RATE = float(environ.get('CIRCUIT_FAILURE_RATE', 0.5))  # Of the window, opens circuit
+CIRCUIT_SLOW_CALL = float(environ.get('CIRCUIT_SLOW_CALL', 2))  # Seconds
+CIRCUIT_SLOW_RATE = float(environ.get('CIRCUIT_SLOW_RATE', 0.5))  # Of the window, opens circuit
+CIRCUIT_OPEN_TIME = float(environ.get('CIRCUIT_OPEN_TIME', 10))  # Seconds before a probe call
+
+ORDER_ATTEMPTS = int(environ.get('ORDER_ATTEMPTS', 10))  # Failed sends before order is failed
+ORDER_CLAIM_TIMEOUT = int(environ.get('ORDER_CLAIM_TIMEOUT', 300))  # Seconds, then claim of a dead drainer expires
+ORDER_RETRY_BACKOFF = float(environ.get('ORDER_RETRY_BACKOFF', 5))  # Seconds before a failed send is retried, doubles every attempt
+
+COMPRESS_MIN_SIZE = int(environ.get('COMPRESS_MIN_SIZE', 1024))  # Bytes, smaller bodies are sent as is
+COMPRESS_LEVEL = int(environ.get('COMPRESS_LEVEL', 6))  # gzip 1 - 9
+COMPRESS_MAX_REQUEST = int(environ.get('COMPRESS_MAX_REQUEST', 16 * 2 ** 20))  # Bytes of decompressed request body
+
+AUTH_CACHE_TTL = float(environ.get('AUTH_CACHE_TTL', 300))  # Seconds a checked password is trusted
+AUTH_CACHE_SIZE = int(environ.get('AUTH_CACHE_SIZE', 1024))  # Credentials per worker
+AUTH_TOKEN_TTL = int(environ.get('AUTH_TOKEN_TTL', 900))  # Seconds a bearer token is valid
+AUTH_TOKEN_AUDIENCE = 'shop-user'  # Tokens of other services are not accepted
+
+PASSWORD_HASH_METHOD = environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:260000')  # werkzeug method:cost, pick it with retailer_service/bench_hash.py
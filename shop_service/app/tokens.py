@@ -0,0 +1,47 @@
+''' Signed bearer tokens.
+
+    POST /token exchanges HTTP Basic credentials for a token signed with
+    SECRET_KEY (HMAC-SHA256). The token carries claims about whom it was
+    issued to (ids, not secrets) and when, and is valid for AUTH_TOKEN_TTL
+    seconds. Checking it takes an HMAC compare in constant time and does not
+    query the DB, so the claims are all a request knows about its caller. A
+    token keeps working until it expires, even after a password change, so
+    keep AUTH_TOKEN_TTL short.
+
+    Services may share SECRET_KEY, so a token is bound to AUTH_TOKEN_AUDIENCE
+    of the service that issued it (in the salt and as 'aud' claim), and is
+    only accepted with all the claims its principal needs.
+'''
+from functools import lru_cache
+from hashlib import sha256
+from types import SimpleNamespace
+
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+
+@lru_cache(maxsize=4)
+def _serializer(secret: str, audience: str) -> URLSafeTimedSerializer:
+    return URLSafeTimedSerializer(secret, salt=f'auth-token:{audience}', signer_kwargs={'digest_method': sha256})
+
+
+def issue(claims: dict) -> str:
+    audience = current_app.config['AUTH_TOKEN_AUDIENCE']
+    return _serializer(current_app.secret_key, audience).dumps({**claims, 'aud': audience})
+
+
+def verify(token: str, *required: str) -> SimpleNamespace:
+    ''' Claims of a valid token of this service as attributes, None if it is
+        not valid or misses any of required claims.
+    '''
+    audience = current_app.config['AUTH_TOKEN_AUDIENCE']
+
+    try:
+        claims = _serializer(current_app.secret_key, audience).loads(token, max_age=current_app.config['AUTH_TOKEN_TTL'])
+    except BadSignature:  # SignatureExpired too
+        return None
+
+    if not isinstance(claims, dict) or claims.get('aud') != audience or any(c not in claims for c in required):
+        return None
+
+    return SimpleNamespace(**claims)
@@ -0,0 +1,79 @@
+''' Benchmark of a proxied call: new requests.session() per call (as it was)
+    vs pooled keep-alive RetailerClient. Reports latency per call.
+
+    python bench_client.py [calls] [url]
+
+    Without url a local keep-alive HTTP server is started, pass url of a
+    running retailer service (like http://localhost:5002) to measure it.
+'''
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from sys import argv
+from threading import Thread
+from time import perf_counter
+
+from requests import session
+
+from app.client import RetailerClient
+
+BODY = b'[{"pid": "hott_pizza", "name": "Hott Pizza"}]'
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive
+    disable_nagle_algorithm = True
+    wbufsize = -1  # Headers and body in one packet, flushed after a request
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+def bench(name, call, calls):
+    call()  # Warm up
+
+    start = perf_counter()
+    for _ in range(calls):
+        assert call().status_code == 200
+    elapsed = perf_counter() - start
+
+    print(f'{name:>8}: {elapsed / calls * 1000:7.3f} ms/call')
+    return elapsed / calls
+
+
+def main():
+    calls = int(argv[1]) if len(argv) > 1 else 1000
+    url = argv[2] if len(argv) > 2 else None
+
+    server = None
+    if url is None:
+        server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_port}'
+
+    client = RetailerClient()
+    client.url = url
+    client.timeout = (1, 10)
+
+    def fresh():
+        with session() as s:
+            return s.get(f'{url}/retailers')
+
+    def pooled():
+        return client.get('/retailers')
+
+    old = bench('session', fresh, calls)
+    new = bench('pooled', pooled, calls)
+    print(f'   saved: {(old - new) * 1000:7.3f} ms/call')
+
+    if server is not None:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+''' Microbenchmark of CPU spent by the shop on a proxied list of products:
+    JSON list of objects (decode, marshal, encode) vs rows format (decode,
+    pick columns, encode). Upstream bodies are made the way retailer makes
+    them. Reports time per request and body size.
+
+    python bench_rows.py [products] [runs]
+'''
+from json import dumps, loads
+from sys import argv
+from timeit import timeit
+from unittest.mock import Mock
+
+from flask_restx import marshal
+
+from app import create_app
+from app.rows import ROWS, decode, marshal_rows
+from app.resources.products import product_model
+
+
+def main():
+    products = int(argv[1]) if len(argv) > 1 else 1000
+    runs = int(argv[2]) if len(argv) > 2 else 200
+
+    items = [
+        {
+            'pid': f'product_{n}',
+            'section_pid': 'summer_sail',
+            'name': f'Product {n}',
+            'about': f'Some info about product number {n}',
+            'price': n % 1000 + 1,
+            'in_stock': n % 50,
+            'is_active': True,
+        }
+        for n in range(products)
+    ]
+    columns = list(items[0])
+
+    plain = dumps(items) + '\n'
+    rows = dumps([columns, *([item[c] for c in columns] for item in items)], separators=(',', ':'))
+
+    plain_response = Mock(headers={'Content-Type': 'application/json'}, json=lambda: loads(plain))
+    rows_response = Mock(headers={'Content-Type': ROWS}, json=lambda: loads(rows))
+
+    with create_app().app_context():
+        cases = {
+            'json': lambda: dumps(marshal(decode(plain_response), product_model)),
+            'rows': lambda: dumps(marshal_rows(decode(rows_response), product_model)),
+        }
+
+        # Cache hit: body is already decoded
+        plain_data, rows_data = decode(plain_response), decode(rows_response)
+        hits = {
+            'json': lambda: dumps(marshal(plain_data, product_model)),
+            'rows': lambda: dumps(marshal_rows(rows_data, product_model)),
+        }
+
+        print(f'{products} products, {runs} runs')
+        print(f'body: json {len(plain) / 1024:.1f} KiB, rows {len(rows) / 1024:.1f} KiB')
+
+        for title, group in (('miss', cases), ('hit', hits)):
+            for name, case in group.items():
+                elapsed = timeit(case, number=runs) / runs
+                print(f'{title:>4} {name}: {elapsed * 1000:6.2f} ms/request')
+
+
+if __name__ == '__main__':
+    main()
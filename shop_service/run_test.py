@@ -7,6 +7,7 @@ from app import create_app, models, db as _db
 def app(request):
     app = create_app()
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SECRET_KEY'] = 'test'
     return app
 
 
@@ -57,3 +58,455 @@ class Test_0:
         session.commit()
 
         # TODO ---
+
+
+class Test_1_Client:
+    def test_1_1_unavailable(self, client, session):
+        from app import retailer
+
+        url, retries = retailer.url, retailer.retries
+        retailer.url, retailer.retries = 'http://127.0.0.1:9', 1
+
+        try:
+            r = client.get('/retailers')
+            assert r.status_code == 503
+        finally:
+            retailer.url, retailer.retries = url, retries
+
+    def test_1_2_circuit(self, client):
+        from app.client import CircuitBreaker, CircuitOpenError
+
+        breaker = CircuitBreaker()
+        breaker.min_calls, breaker.open_time = 4, 0
+
+        for failed in (False, True, True, False):
+            breaker.allow()
+            breaker.record(failed, 0.01)
+        assert breaker.state == breaker.OPEN
+
+        breaker.open_time = 60
+        with pytest.raises(CircuitOpenError):
+            breaker.allow()
+
+        breaker.open_time = 0
+        breaker.allow()  # Probe
+        with pytest.raises(CircuitOpenError):
+            breaker.allow()
+
+        breaker.record(False, 0.01)
+        assert breaker.state == breaker.CLOSED
+
+        r = client.get('/circuit')
+        assert r.status_code == 200
+        assert r.json['state'] in ('closed', 'open', 'half_open')
+
+
+    def test_1_3_compress(self, app):
+        from gzip import decompress
+        from json import loads
+        from app.client import RetailerClient
+
+        client = RetailerClient()
+        client.init_app(app)
+
+        small = client._encode(json={'a': 1})
+        assert 'Content-Encoding' not in small['headers']
+
+        body = {'products': {f'product_{n}': n for n in range(200)}}
+        large = client._encode(json=body, headers={'Idempotency-Key': 'k'})
+        assert large['headers']['Content-Encoding'] == 'gzip'
+        assert large['headers']['Idempotency-Key'] == 'k'
+        assert loads(decompress(large['data'])) == body
+
+
+class Test_2_Cache:
+    class Upstream:
+        '''Fake retailer client, counts requests.'''
+        def __init__(self):
+            self.calls = 0
+            self.error = None
+
+        def get(self, path, params=None, headers=None):
+            from time import sleep
+            from unittest.mock import Mock
+
+            self.calls += 1
+            sleep(0.05)
+
+            if self.error:
+                raise self.error
+
+            if headers and headers.get('If-None-Match') == '"1"':
+                return Mock(status_code=304, headers={})
+
+            return Mock(status_code=200, headers={'ETag': '"1"'}, json=lambda: [{'pid': path}])
+
+    def test_2_1_single_flight(self, app):
+        from concurrent.futures import ThreadPoolExecutor
+        from app.cache import CatalogCache
+
+        upstream = self.Upstream()
+        cache = CatalogCache(upstream)
+
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(lambda _: cache.get('/retailers'), range(8)))
+
+        assert upstream.calls == 1
+        assert all(r == (200, [{'pid': '/retailers'}], {}) for r in results)
+
+    def test_2_2_stale(self, app):
+        from requests.exceptions import ConnectionError
+        from app.cache import CatalogCache
+
+        upstream = self.Upstream()
+        cache = CatalogCache(upstream)
+        cache.ttl = cache.stale = 0
+
+        first = cache.get('/retailers')
+
+        upstream.error = ConnectionError()
+        assert cache.get('/retailers') == first
+
+        with pytest.raises(ConnectionError):
+            cache.get('/sections/shop_1')
+
+    def test_2_3_revalidate(self, app):
+        from time import sleep
+        from app.cache import CatalogCache
+
+        upstream = self.Upstream()
+        cache = CatalogCache(upstream)
+        cache.ttl = 0
+
+        first = cache.get('/retailers')
+        assert cache.get('/retailers') == first  # Stale, revalidates in background
+        sleep(0.2)
+
+        assert upstream.calls == 2
+        assert cache.hits == 1
+
+    def test_2_4_rows(self, client):
+        from unittest.mock import Mock
+        from app import catalog
+        from app.rows import ROWS
+
+        columns = ['pid', 'section_pid', 'name', 'about', 'price', 'in_stock', 'is_active']
+        body = [columns, ['p1', 's1', 'P 1', 'About', 10, 3, True], ['p2', 's1', 'P 2', 'About', 20, 0, True]]
+        sent = []
+
+        def get(path, params=None, headers=None):
+            sent.append(headers['Accept'])
+            return Mock(status_code=200, headers={'Content-Type': ROWS}, json=lambda: body)
+
+        upstream, catalog.client = catalog.client, Mock(get=get)
+        catalog.clear()
+
+        try:
+            r = client.get('/products/s1')
+        finally:
+            catalog.client = upstream
+            catalog.clear()
+
+        assert sent[0].startswith(ROWS)
+        assert r.json == [
+            {'pid': 'p1', 'section_pid': 's1', 'name': 'P 1', 'about': 'About', 'price': 10, 'in_stock': 3},
+            {'pid': 'p2', 'section_pid': 's1', 'name': 'P 2', 'about': 'About', 'price': 20, 'in_stock': 0},
+        ]
+
+    def test_2_5_whole_list(self, client):
+        from unittest.mock import Mock
+        from app import catalog
+
+        columns = ['pid', 'section_pid', 'name', 'about', 'price', 'in_stock', 'is_active']
+        body = [{**dict.fromkeys(columns), 'pid': f'p{n:03}', 'section_pid': 's1', 'price': 1, 'in_stock': 1} for n in range(150)]
+        sent = []
+
+        def get(path, params=None, headers=None):
+            sent.append(dict(params))
+            return Mock(status_code=200, headers={}, json=lambda: body)
+
+        upstream, catalog.client = catalog.client, Mock(get=get)
+        catalog.clear()
+
+        try:
+            r = client.get('/products/s1')
+        finally:
+            catalog.client = upstream
+            catalog.clear()
+
+        # No limit is made up, retailer service returns the whole list
+        assert sent == [{}]
+        assert len(r.json) == 150
+        assert 'X-Next-Cursor' not in r.headers
+
+    def test_2_6_plain_error(self, client):
+        from unittest.mock import Mock
+        from app import catalog
+
+        def html():
+            raise ValueError('Expecting value')
+
+        def get(path, params=None, headers=None):
+            return Mock(status_code=502, headers={}, text='<html>502 Bad Gateway</html>', json=html)
+
+        upstream, catalog.client = catalog.client, Mock(get=get)
+        catalog.clear()
+
+        try:
+            r = client.get('/products/s1')
+        finally:
+            catalog.client = upstream
+            catalog.clear()
+
+        assert r.status_code == 502
+        assert r.json['message'] == '<html>502 Bad Gateway</html>'
+
+
+class Test_3_Storefront:
+    class Upstream:
+        ''' Fake retailer service: 3 retailers x 3 sections x 2 products.
+            Counts requests in flight, a request for sections waits (1 s at
+            most) until all 3 of them are in flight.
+        '''
+        def __init__(self):
+            from threading import Event, Lock
+
+            self.in_flight = 0
+            self.peak = 0
+            self._lock = Lock()
+            self._sections = Event()
+
+        def get(self, path, params=None, headers=None):
+            from unittest.mock import Mock
+
+            kind, _, pid = path.strip('/').partition('/')
+
+            with self._lock:
+                self.in_flight += 1
+                self.peak = max(self.peak, self.in_flight)
+
+                if self.in_flight >= 3:
+                    self._sections.set()
+
+            try:
+                if kind == 'sections':
+                    self._sections.wait(1)
+
+                data = {
+                    'retailers': lambda: [{'pid': f'r{n}', 'name': f'R{n}'} for n in range(3)],
+                    'sections': lambda: [{'pid': f'{pid}s{n}', 'retailer_pid': pid} for n in range(3)],
+                    'products': lambda: [{'pid': f'{pid}p{n}', 'section_pid': pid} for n in range(2)],
+                }[kind]()
+
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+
+            return Mock(status_code=200, headers={}, json=lambda: data)
+
+    def test_3_1_tree(self, client):
+        from json import loads
+        from app import catalog
+
+        upstream, catalog.client = catalog.client, self.Upstream()
+        catalog.clear()
+
+        try:
+            r = client.get('/storefront')
+            tree = loads(r.data)
+            peak = catalog.client.peak
+        finally:
+            catalog.client = upstream
+            catalog.clear()
+
+        assert r.status_code == 200
+        assert [n['pid'] for n in tree] == ['r0', 'r1', 'r2']
+        assert [s['pid'] for s in tree[1]['sections']] == ['r1s0', 'r1s1', 'r1s2']
+        assert [p['pid'] for p in tree[1]['sections'][2]['products']] == ['r1s2p0', 'r1s2p1']
+
+        # Sections of all retailers were requested at once, not one by one
+        assert peak >= 3
+
+
+class Test_4_History:
+    def test_4_1_full(self, client, session, monkeypatch):
+        from unittest.mock import Mock
+        from app import retailer
+
+        r = client.post('/user', json={
+            'login': 'history_user',
+            'password': 'ps',
+            'email': 'history_user@mail.com',
+            'first_name': 'Fname',
+            'last_name': 'Lname',
+        })
+        assert r.status_code == 201
+        user_id = r.json['id']
+
+        session.add_all(models.HistoryModel(user_id=user_id, contract=f'aid_{n}') for n in range(5))
+        session.commit()
+
+        calls = []
+
+        def get(path, params=None, **kwargs):
+            calls.append((path, params))
+            data = [{'aid': aid, 'retailer_pid': 'shop_1', 'transactions': []} for aid in params['aid'] if aid != 'aid_3']
+            return Mock(status_code=200, json=lambda: data)
+
+        monkeypatch.setattr(retailer, 'get', get)
+
+        r = client.get('/history/full', auth=('history_user', 'ps'), query_string={'limit': 3})
+        assert r.status_code == 200
+        assert [h['contract'] for h in r.json] == ['aid_4', 'aid_3', 'aid_2']
+        assert r.json[1]['details'] is None
+        assert r.json[0]['details']['retailer_pid'] == 'shop_1'
+
+        r = client.get('/history/full', auth=('history_user', 'ps'), query_string={'limit': 3, 'cursor': r.headers['X-Next-Cursor']})
+        assert [h['contract'] for h in r.json] == ['aid_1', 'aid_0']
+        assert 'X-Next-Cursor' not in r.headers
+
+        assert len(calls) == 2
+
+    def test_4_2_receipt(self, client, session, monkeypatch):
+        from unittest.mock import Mock
+        from app import retailer
+
+        contract = {
+            'aid': 'aid_receipt',
+            'retailer_pid': 'shop_1',
+            'pay_method': 'cash',
+            'datetime': '2022-02-02T10:20:30.123456',
+            'transactions': [{'product_pid': 'product_1_1', 'amount': -2, 'sold_at': 10}],
+        }
+
+        def post(path, idempotency_key=None, **kwargs):
+            return Mock(status_code=200, json=lambda: {'contract_aid': contract['aid'], 'contract': contract})
+
+        def get(path, **kwargs):
+            raise AssertionError('Retailer service must not be asked')
+
+        monkeypatch.setattr(retailer, 'post', post)
+        monkeypatch.setattr(retailer, 'get', get)
+
+        r = client.post('/buy', auth=('history_user', 'ps'), json={
+            'retailer_pid': 'shop_1',
+            'products': {'product_1_1': 2},
+            'pay_method': 'cash',
+        })
+        assert r.status_code == 200
+
+        # Replayed by retailer (same contract), no second cheque
+        r = client.post('/buy', auth=('history_user', 'ps'), headers={'Idempotency-Key': 'k'}, json={
+            'retailer_pid': 'shop_1',
+            'products': {'product_1_1': 2},
+            'pay_method': 'cash',
+        })
+        assert r.status_code == 200
+        assert models.HistoryModel.query.filter_by(contract='aid_receipt').count() == 1
+
+        r = client.get('/history/aid_receipt', auth=('history_user', 'ps'))
+        assert r.status_code == 200
+        assert r.json == contract
+
+        r = client.get('/history/full', auth=('history_user', 'ps'), query_string={'limit': 1})
+        assert r.json[0]['details'] == contract
+
+
+class Test_5_Orders:
+    def test_5_1_async_buy(self, app, client, session, monkeypatch):
+        from unittest.mock import Mock
+        from app import retailer
+        from app.commands import drain
+
+        auth = ('history_user', 'ps')
+        body = {'retailer_pid': 'shop_1', 'products': {'product_1_1': 1}, 'pay_method': 'cash'}
+
+        ids = []
+        for _ in range(3):
+            r = client.post('/buy', auth=auth, json=body, headers={'Prefer': 'respond-async'})
+            assert r.status_code == 202
+            assert r.headers['Location'].endswith(f"/order/{r.json['order_id']}")
+            ids.append(r.json['order_id'])
+
+        assert client.get(f'/order/{ids[0]}', auth=auth).json['status'] == 'queued'
+
+        contract = {
+            'aid': 'aid_order',
+            'retailer_pid': 'shop_1',
+            'pay_method': 'cash',
+            'datetime': '2022-02-02T10:20:30',
+            'transactions': [{'product_pid': 'product_1_1', 'amount': -1, 'sold_at': 10}],
+        }
+        responses = iter([
+            Mock(status_code=200, json=lambda: {'contract_aid': 'aid_order', 'contract': contract}),
+            Mock(status_code=400, json=lambda: {'message': 'Demand is too high.'}),
+            Mock(status_code=503, json=lambda: {}),
+        ])
+        monkeypatch.setattr(retailer, 'post', lambda path, idempotency_key=None, **kwargs: next(responses))
+
+        assert drain(10) == 2  # The third one is put back
+
+        done, failed, queued = (client.get(f'/order/{n}', auth=auth).json for n in ids)
+        assert (done['status'], done['contract']) == ('done', 'aid_order')
+        assert (failed['status'], failed['errors']) == ('failed', {'message': 'Demand is too high.'})
+        assert queued['status'] == 'queued'
+
+        assert client.get('/history/aid_order', auth=auth).json == contract
+
+        r = client.get(f'/order/{ids[0]}', auth=('user_x', 'ps'))
+        assert r.status_code == 401
+
+    def test_5_2_outage(self, app, client, session, monkeypatch):
+        from datetime import datetime
+        from requests.exceptions import ConnectionError
+        from app import retailer
+        from app.commands import drain
+
+        auth = ('history_user', 'ps')
+        body = {'retailer_pid': 'shop_1', 'products': {'product_1_1': 1}, 'pay_method': 'cash'}
+
+        r = client.post('/buy', auth=auth, json=body, headers={'Prefer': 'respond-async'})
+        order_id = r.json['order_id']
+
+        calls = []
+
+        def post(path, idempotency_key=None, **kwargs):
+            calls.append(idempotency_key)
+            raise ConnectionError()
+
+        monkeypatch.setattr(retailer, 'post', post)
+
+        # Put back with backoff, not claimed again by the next pass
+        assert drain(10) == 0
+        assert drain(10) == 0
+        assert len(calls) == 1
+
+        order = models.OrderModel.query.get(order_id)
+        assert (order.status, order.attempts) == ('queued', 1)
+        assert order.retry_at > datetime.utcnow()
+
+
+class Test_6_Token:
+    def test_6_1_token(self, client, session):
+        r = client.post('/user', json={
+            'login': 'token_user',
+            'password': 'ps',
+            'email': 'token_user@mail.com',
+            'first_name': 'Fname',
+            'last_name': 'Lname',
+        })
+        assert r.status_code == 201
+
+        r = client.post('/token', auth=('token_user', 'ps'))
+        assert r.status_code == 200
+        bearer = {'Authorization': f"Bearer {r.json['token']}"}
+
+        assert client.get('/history', headers=bearer).status_code == 200
+
+        r = client.patch('/user', headers=bearer, json={'first_name': 'Token'})
+        assert r.json['first_name'] == 'Token'
+
+        assert client.get('/user', headers={'Authorization': 'Bearer nonsense'}).status_code == 401
+
+        assert client.delete('/user', headers=bearer).status_code == 200
+        assert client.get('/user', headers=bearer).status_code == 401
@@ -0,0 +1,59 @@
+''' Benchmark of primary key schemes for Aid models: old random 32 chars vs
+    time-ordered ULID-like keys. Inserts rows into a SQLite WITHOUT ROWID
+    table (clustered by primary key, like InnoDB) and reports insert rate
+    and file size.
+
+    python bench_aid.py [rows]
+'''
+
+from importlib.util import module_from_spec, spec_from_file_location
+from os import path
+from random import choices
+from sqlite3 import connect
+from string import ascii_letters, digits
+from sys import argv
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+
+
+def load_aid():
+    spec = spec_from_file_location('_aid', path.join(ROOT, 'retailer_service', 'app', 'models', '_aid.py'))
+    module = module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.Aid
+
+
+def random_key():
+    return ''.join(choices(ascii_letters + digits, k=32))
+
+
+def bench(directory, name, generate, rows, batch=1000):
+    db = connect(path.join(directory, f'{name}.sqlite3'))
+    db.execute('CREATE TABLE t (aid VARCHAR(32) PRIMARY KEY, amount INTEGER) WITHOUT ROWID')
+
+    start = perf_counter()
+    for _ in range(0, rows, batch):
+        db.executemany('INSERT INTO t VALUES (?, ?)', ((generate(), 1) for _ in range(batch)))
+        db.commit()
+    elapsed = perf_counter() - start
+
+    pages, = db.execute('PRAGMA page_count').fetchone()
+    size, = db.execute('PRAGMA page_size').fetchone()
+    db.close()
+
+    print(f'{name:>8}: {rows / elapsed:10.0f} rows/s, {pages * size / 2 ** 20:7.2f} MiB')
+
+
+def main():
+    rows = int(argv[1]) if len(argv) > 1 else 500_000
+    aid = load_aid()
+
+    with TemporaryDirectory() as tmp:
+        bench(tmp, 'random', random_key, rows)
+        bench(tmp, 'ulid', aid.generate_key, rows)
+
+
+if __name__ == '__main__':
+    main()